@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from pyzbar.pyzbar import decode
+
+from main import BarcodeDecoder
+
+
+def read_frames(path: str) -> list:
+	if os.path.isdir(path):
+		names = sorted(name for name in os.listdir(path) if name.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")))
+		return [cv2.imread(os.path.join(path, name)) for name in names]
+
+	frames = []
+	video = cv2.VideoCapture(path)
+	while True:
+		ret, frame = video.read()
+		if not ret:
+			break
+		frames.append(frame)
+	video.release()
+	return frames
+
+
+## The original CameraWorker path, the full colour frame every time
+def legacy_decode(frame):
+	for decoded_barcode in decode(frame):
+		if decoded_barcode and decoded_barcode.type == "EAN13":
+			return decoded_barcode.data.decode("utf-8"), decoded_barcode.rect
+	return None
+
+
+def measure(name: str, decode_frame, frames: list):
+	hits = 0
+	wall_started = time.perf_counter()
+	cpu_started = time.process_time()
+
+	for frame in frames:
+		if decode_frame(frame):
+			hits += 1
+
+	wall = (time.perf_counter() - wall_started) / len(frames) * 1000
+	cpu = (time.process_time() - cpu_started) / len(frames) * 1000
+	print(f"{name:<12} decode rate {hits / len(frames):6.1%}   {wall:7.2f} ms/frame   {cpu:7.2f} CPU ms/frame   max {1000 / wall:6.1f} fps")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare full-frame and ROI/downscaled barcode decoding on recorded footage")
+	parser.add_argument("footage", help="Video file or directory of frame images")
+	args = parser.parse_args()
+
+	frames = read_frames(args.footage)
+	if not frames:
+		sys.exit(f"[ERROR] - No frames could be read from '{args.footage}'")
+
+	print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+	measure("full frame", legacy_decode, frames)
+
+	decoder = BarcodeDecoder()
+	measure("fast path", decoder.decode, frames)
+	print(f"fast path attempts: {decoder.stats()['attempts']}")
@@ -0,0 +1,181 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication
+
+from core import BasicDB
+from search_index import SearchIndex
+from scraping import BookScraper, HTML_PARSER
+from main import BookModel, MainWindow
+from library_generator import LibraryGenerator
+from standin_server import PAGES_DIR
+
+
+## The MainWindow refresh and search code, run against a collection without building any widgets
+class HeadlessLibrary:
+
+	search_book = MainWindow.search_book
+	_update_model = MainWindow._update_model
+	extract_values_from_docs = MainWindow.extract_values_from_docs
+
+	def __init__(self, db: BasicDB, search_index: SearchIndex = None):
+		self.db = db
+		self.books = db.find()
+		self.books_list = self.extract_values_from_docs(self.books)
+		self.model = BookModel(self.books_list)
+
+		## Without a ready index every search scans the collection file
+		self.search_index = search_index or SearchIndex(db.file_path)
+
+	def refresh_search_index(self):
+		pass
+
+
+def timed(operation, repeat: int) -> dict:
+	samples = []
+	for run in range(repeat):
+		## BasicDB logs every write, keep that out of the timings and the report
+		with contextlib.redirect_stdout(io.StringIO()):
+			started = time.perf_counter()
+			operation(run)
+			samples.append((time.perf_counter() - started) * 1000)
+
+	return {
+		"runs": repeat,
+		"min_ms": min(samples),
+		"median_ms": statistics.median(samples),
+		"max_ms": max(samples),
+	}
+
+
+def bench_collection(size: int, repeat: int, seed: int) -> dict:
+	generator = LibraryGenerator(seed=seed)
+	documents = generator.library(size)
+	rng = random.Random(seed)
+
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		with contextlib.redirect_stdout(io.StringIO()):
+			db = BasicDB(collection_name="books", root_dir=os.path.join(tmp_dir, "main.py"))
+		db._write_all_documents(documents)
+
+		ids = [doc["_id"] for doc in documents]
+		sample = documents[size // 2]
+		results = {"books": size, "file_mb": os.path.getsize(db.file_path) / 1024 / 1024}
+
+		results["create"] = timed(lambda run: db.create(generator.book()), repeat)
+		results["create_many_100"] = timed(lambda run: db.create_many(generator.library(100)), repeat)
+		results["find"] = timed(lambda run: db.find(), repeat)
+		results["find_query"] = timed(lambda run: db.find({"isbn13": sample["isbn13"]}), repeat)
+		results["find_by_id"] = timed(lambda run: db.find_by_id(rng.choice(ids)), repeat)
+		results["update"] = timed(lambda run: db.find_by_id_and_update(ids[run], generator.book()), repeat)
+		results["delete"] = timed(lambda run: db.find_by_id_and_delete(ids[-1 - run]), repeat)
+
+		version = db.version()
+		books = db.find()
+		search_index = SearchIndex(db.file_path)
+		results["search_index_build"] = timed(lambda run: search_index.install(search_index.build(books, version), books, version), repeat)
+		results["search_index_build"]["mb"] = os.path.getsize(search_index.index_path) / 1024 / 1024
+		results["search_index_load"] = timed(lambda run: SearchIndex(db.file_path).load(version, books), repeat)
+
+		library = HeadlessLibrary(db)
+		indexed_library = HeadlessLibrary(db, search_index)
+		queries = {
+			"title_word": sample["title"].split()[0].lower(),
+			"author": sample["authors"] or sample["title"],
+			"isbn13": sample["isbn13"],
+			"miss": "zzqxj",
+		}
+		for name, query in queries.items():
+			results[f"search_{name}"] = timed(lambda run: library.search_book(query), repeat)
+			results[f"search_{name}"]["matches"] = len(library.books_list)
+			results[f"indexed_search_{name}"] = timed(lambda run: indexed_library.search_book(query), repeat)
+			results[f"indexed_search_{name}"]["matches"] = len(indexed_library.books_list)
+
+		results["update_model"] = timed(lambda run: library._update_model(), repeat)
+		books = db.find()
+		results["extract_values_from_docs"] = timed(lambda run: library.extract_values_from_docs(books), repeat)
+
+	return results
+
+
+def bench_parse(pages_dir: str, repeat: int) -> dict:
+	results = {}
+	for name in sorted(os.listdir(pages_dir)):
+		if not name.endswith(".html"):
+			continue
+
+		with open(os.path.join(pages_dir, name), mode="r", encoding="utf-8") as file:
+			html = file.read()
+
+		results[name] = timed(lambda run: BookScraper.parse_page(html), repeat)
+		results[name]["kb"] = len(html) / 1024
+	return results
+
+
+def compare(current: dict, previous: dict):
+	print(f"\nCompared with {previous['timestamp']}:")
+	for group, entries in current["results"].items():
+		for name, result in entries.items():
+			for operation, timing in result.items():
+				before = previous["results"].get(group, {}).get(name, {}).get(operation)
+				if not isinstance(timing, dict) or not before:
+					continue
+				ratio = timing["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+				flag = "  <-- slower" if ratio > 1.2 else ""
+				print(f"  {group}/{name}/{operation:<28} {before['median_ms']:>10.3f} -> {timing['median_ms']:>10.3f} ms  x{ratio:.2f}{flag}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Benchmark BasicDB, search, model refresh and page parsing on synthetic libraries")
+	parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated library sizes, up to 1000000")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--pages", default=PAGES_DIR, help="Directory of product pages (*.html), the default holds synthetic ones only")
+	parser.add_argument("--output", default="bench_library.json", help="Where to write the JSON results")
+	parser.add_argument("--compare", help="Earlier JSON results to compare the medians against")
+	args = parser.parse_args()
+
+	app = QCoreApplication.instance() or QCoreApplication([])
+
+	report = {
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"html_parser": HTML_PARSER,
+		"repeat": args.repeat,
+		"results": {"collections": {}, "parse": {}},
+	}
+
+	for size in [int(size) for size in args.sizes.split(",") if size]:
+		print(f"[INFO] - Benchmarking {size} books...")
+		result = bench_collection(size, args.repeat, args.seed)
+		report["results"]["collections"][str(size)] = result
+
+		print(f"  {'collection file':<28} {result['file_mb']:>10.1f} MB")
+		for operation, timing in result.items():
+			if isinstance(timing, dict):
+				print(f"  {operation:<28} {timing['median_ms']:>10.3f} ms median  ({timing['min_ms']:.3f} - {timing['max_ms']:.3f})")
+
+	print(f"[INFO] - Parsing pages from '{args.pages}' with {HTML_PARSER} (synthetic_* pages are generated, not saved product pages)...")
+	report["results"]["parse"]["pages"] = bench_parse(args.pages, args.repeat)
+	for name, timing in report["results"]["parse"]["pages"].items():
+		print(f"  {name:<28} {timing['median_ms']:>10.3f} ms median  ({timing['kb']:.0f} KB)")
+
+	with open(args.output, mode="w", encoding="utf-8") as file:
+		json.dump(report, file, indent=2)
+	print(f"[INFO] - Results written to '{args.output}'")
+
+	if args.compare:
+		with open(args.compare, mode="r", encoding="utf-8") as file:
+			compare(report, json.load(file))
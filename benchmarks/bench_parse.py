@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from scraping import BookScraper, HTML_PARSER
+from standin_server import PAGES_DIR
+
+## benchmarks/pages only holds generated stand-ins (synthetic_*.html), real Amazon markup has to be saved and passed with --pages
+
+
+## The original ScraperWorker.run extraction, kept as the baseline
+def legacy_parse_page(html: str) -> dict:
+	soup = BeautifulSoup(html, "html.parser")
+
+	title = soup.find(id="productTitle").text.strip() if soup.find(id="productTitle") else ""
+	author = soup.find(class_="author").a.text if soup.find(class_="author").a else ""
+
+	details = {}
+	for i in soup.find(id="detailBullets_feature_div").find("ul").find_all(class_="a-list-item"):
+		for label_text, field in BookScraper.DETAIL_LABELS:
+			if label_text in i.find_all("span")[0].text:
+				details[field] = i.find_all("span")[1].text
+				break
+
+	isDescription = True if soup.find(id="bookDescription_feature_div") else False
+	description = soup.find(id="bookDescription_feature_div").text.strip().replace(" Read more", "") if isDescription else ""
+
+	return {"title": title, "author": author, **details, "description": description}
+
+
+def measure(parse, html: str, repeat: int) -> tuple:
+	started = time.perf_counter()
+	for _ in range(repeat):
+		parse(html)
+	elapsed = (time.perf_counter() - started) / repeat
+
+	tracemalloc.start()
+	parse(html)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	return elapsed, peak
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Benchmark product page extraction over a directory of pages, synthetic stand-ins by default")
+	parser.add_argument("--pages", default=PAGES_DIR, help="Directory of product pages (*.html), the default holds synthetic ones only")
+	parser.add_argument("--repeat", type=int, default=10)
+	args = parser.parse_args()
+
+	print(f"Parser backend: {HTML_PARSER}")
+	if any(name.startswith("synthetic_") for name in os.listdir(args.pages)):
+		print("[WARNING] - synthetic_* pages are generated filler, their timings say nothing about real product pages")
+	print(f"{'page':<24} {'size':>9} {'legacy ms':>10} {'legacy peak':>12} {'targeted ms':>12} {'targeted peak':>14}")
+
+	for name in sorted(os.listdir(args.pages)):
+		if not name.endswith(".html"):
+			continue
+
+		with open(os.path.join(args.pages, name), mode="r", encoding="utf-8") as file:
+			html = file.read()
+
+		if BookScraper.parse_page(html) != {**dict.fromkeys(BookScraper.FIELDS, ""), **legacy_parse_page(html)}:
+			print(f"[WARNING] - {name}: targeted extraction differs from the legacy result")
+
+		legacy_time, legacy_peak = measure(legacy_parse_page, html, args.repeat)
+		targeted_time, targeted_peak = measure(BookScraper.parse_page, html, args.repeat)
+
+		print(f"{name:<24} {len(html) // 1024:>7}KB {legacy_time * 1000:>10.2f} {legacy_peak / 1024 / 1024:>10.2f}MB {targeted_time * 1000:>12.2f} {targeted_peak / 1024 / 1024:>12.2f}MB")
@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import canonical_isbn13
+from scraping import AmazonProvider, GoogleBooksProvider, OpenLibraryProvider, ProviderChain
+from standin_server import StandInServer
+from bench_scraper_engine import generate_isbns
+
+
+OPENLIBRARY_RESPONSE = json.dumps({
+	"ISBN:9780451524935": {
+		"title": "Nineteen Eighty-Four",
+		"authors": [{"name": "George Orwell"}],
+		"publishers": [{"name": "Signet Classic"}],
+		"publish_date": "1961",
+		"identifiers": {"isbn_10": ["0451524934"], "isbn_13": ["9780451524935"]},
+		"number_of_pages": 328,
+	}
+}).encode("utf-8")
+
+GOOGLEBOOKS_RESPONSE = json.dumps({
+	"items": [{
+		"volumeInfo": {
+			"title": "Nineteen Eighty-Four",
+			"authors": ["George Orwell"],
+			"publisher": "Signet Classic",
+			"publishedDate": "1961",
+			"industryIdentifiers": [{"type": "ISBN_10", "identifier": "0451524934"}, {"type": "ISBN_13", "identifier": "9780451524935"}],
+			"pageCount": 328,
+			"language": "en",
+			"description": "A dystopian novel.",
+		}
+	}]
+}).encode("utf-8")
+
+
+def run_scenario(name: str, chain: ProviderChain, isbns: list):
+	latencies = []
+	failures = 0
+
+	for _isbn in isbns:
+		started = time.perf_counter()
+		try:
+			chain.lookup(canonical_isbn13(_isbn))
+		except Exception:
+			failures += 1
+		latencies.append(time.perf_counter() - started)
+
+	latencies.sort()
+	print(f"\n{name}: p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f}ms, {failures} failed")
+	for provider_name, stats in chain.get_stats().items():
+		print(f"  {provider_name:<12} {stats}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare single-provider, hedged and parallel provider chains against stub servers")
+	parser.add_argument("--lookups", type=int, default=40)
+	parser.add_argument("--slow-latency", type=float, default=1.0, help="Response delay of the slow Amazon stub")
+	parser.add_argument("--hedge-delay", type=float, default=0.2)
+	args = parser.parse_args()
+
+	isbns = generate_isbns(args.lookups)
+
+	with StandInServer(latency=args.slow_latency) as amazon, \
+		StandInServer(pages=[OPENLIBRARY_RESPONSE], latency=0.05, content_type="application/json") as openlibrary, \
+		StandInServer(pages=[GOOGLEBOOKS_RESPONSE], status=503, content_type="application/json") as googlebooks:
+
+		def providers():
+			return [
+				AmazonProvider(amazon.base_url),
+				GoogleBooksProvider(googlebooks.base_url),
+				OpenLibraryProvider(openlibrary.base_url),
+			]
+
+		run_scenario("amazon only", ProviderChain(providers()[:1]), isbns)
+		run_scenario(f"hedged after {args.hedge_delay}s", ProviderChain(providers(), hedge_delay=args.hedge_delay), isbns)
+		run_scenario("all in parallel", ProviderChain(providers(), hedge_delay=None), isbns)
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication, Qt
+
+from main import CameraWorker
+
+
+def replay(source: str, paced: bool, expected: set) -> dict:
+	app = QCoreApplication.instance() or QCoreApplication([])
+
+	worker = CameraWorker(source=source)
+	worker.paced = paced
+	confirmed = []
+
+	## Nothing displays the previews, hand every buffer straight back like the GUI would
+	worker.frame.connect(lambda q_img, index: worker.release_preview(index), Qt.ConnectionType.DirectConnection)
+	worker.isbn.connect(lambda isbn: confirmed.append((time.perf_counter(), isbn)), Qt.ConnectionType.DirectConnection)
+	worker.error.connect(lambda error: print(f"[ERROR] - {error}"))
+	worker.finished.connect(app.quit)
+
+	started = time.perf_counter()
+	worker.start_camera()
+	app.exec()
+	worker.wait()
+	wall = time.perf_counter() - started
+
+	## Synthetic sources know what they rendered
+	if not expected and hasattr(worker.camera, "codes"):
+		expected = set(worker.camera.codes)
+
+	reads = sum(worker.read_codes.values())
+	false_reads = sum(count for code, count in worker.read_codes.items() if code not in expected)
+	decoder = worker.decoder.stats()
+
+	return {
+		"source": source,
+		"paced": paced,
+		"wall_s": wall,
+		"capture_fps": worker.profile["frames"] / wall,
+		"decode_fps": decoder["frames"] / wall,
+		"decode_ms_per_frame": decoder["ms_per_frame"],
+		"decode_rate": decoder["decode_rate"],
+		"first_read_s": worker.profile["first_read"],
+		"first_confirmed_s": confirmed[0][0] - started if confirmed else None,
+		"reads": reads,
+		"false_read_rate": false_reads / reads if reads and expected else None,
+		"confirmed": [isbn for _, isbn in confirmed],
+		"false_confirmed": [isbn for _, isbn in confirmed if expected and isbn not in expected],
+	}
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Replay a frame source headlessly through the camera worker's decode path")
+	parser.add_argument("source", help="Video file, image directory, 'synthetic' or 'synthetic:<isbn>,<isbn>'")
+	parser.add_argument("--unpaced", action="store_true", help="Read frames as fast as possible instead of at the source frame rate")
+	parser.add_argument("--expect", default="", help="Comma separated ISBNs that are really in the footage, for the false-read rate")
+	args = parser.parse_args()
+
+	result = replay(args.source, not args.unpaced, {code for code in args.expect.split(",") if code})
+
+	def seconds(value):
+		return f"{value:.3f} s" if value is not None else "never"
+
+	print(f"Source            {result['source']} ({'paced' if result['paced'] else 'unpaced'}, {result['wall_s']:.2f} s)")
+	print(f"Capture           {result['capture_fps']:.1f} fps")
+	print(f"Decode            {result['decode_fps']:.1f} fps, {result['decode_ms_per_frame']:.2f} ms/frame, decode rate {result['decode_rate']:.1%}")
+	print(f"First read        {seconds(result['first_read_s'])}")
+	print(f"First confirmed   {seconds(result['first_confirmed_s'])}")
+	if result["false_read_rate"] is None:
+		print(f"False reads       unknown, pass --expect ({result['reads']} reads)")
+	else:
+		print(f"False reads       {result['false_read_rate']:.2%} of {result['reads']} reads")
+	print(f"Confirmed         {', '.join(result['confirmed']) or '-'}")
+	if result["false_confirmed"]:
+		print(f"False confirmed   {', '.join(result['false_confirmed'])}")
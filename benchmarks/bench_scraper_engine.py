@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication, QThreadPool
+
+from main import ScraperWorker
+from scraping import AsyncScraperEngine
+from standin_server import StandInServer
+
+
+## Valid ISBN-10s, every lookup gets its own so nothing is served from a cache
+def generate_isbns(count: int) -> list:
+	isbns = []
+	for n in range(count):
+		body = f"{100000000 + n:09d}"
+		check = (11 - sum((10 - i) * int(d) for i, d in enumerate(body)) % 11) % 11
+		isbns.append(body + ("X" if check == 10 else str(check)))
+	return isbns
+
+
+def bench_thread_per_request(app, base_url: str, isbns: list) -> tuple:
+	threadpool = QThreadPool()
+	remaining = [len(isbns)]
+	failures = []
+
+	def done(*args):
+		remaining[0] -= 1
+		if remaining[0] == 0:
+			app.quit()
+
+	def failed(error):
+		failures.append(error)
+		done()
+
+	## Keep the workers referenced so their signal objects outlive the runs
+	workers = []
+
+	started = time.perf_counter()
+	for _isbn in isbns:
+		worker = ScraperWorker(_isbn, base_url=base_url)
+		worker.signals.result.connect(done)
+		worker.signals.error.connect(failed)
+		threadpool.start(worker)
+		workers.append(worker)
+
+	app.exec()
+	return time.perf_counter() - started, len(failures)
+
+
+def bench_async_engine(base_url: str, isbns: list, concurrency: int) -> tuple:
+	engine = AsyncScraperEngine(max_concurrency=concurrency, per_host_concurrency=concurrency, base_url=base_url)
+	engine.start()
+
+	started = time.perf_counter()
+	futures = [engine.submit(_isbn) for _isbn in isbns]
+	failures = sum(1 for future in futures if future.exception())
+	elapsed = time.perf_counter() - started
+
+	engine.stop()
+	return elapsed, failures
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare ScraperWorker threads against AsyncScraperEngine")
+	parser.add_argument("--lookups", type=int, default=500)
+	parser.add_argument("--latency", type=float, default=0.2, help="Stand-in server response delay in seconds")
+	parser.add_argument("--concurrency", type=int, default=200)
+	args = parser.parse_args()
+
+	app = QCoreApplication(sys.argv)
+	isbns = generate_isbns(args.lookups)
+
+	with StandInServer(latency=args.latency) as server:
+		print(f"QThreadPool max threads: {QThreadPool().maxThreadCount()}")
+
+		for name, (elapsed, failures) in [
+			("thread-per-request", bench_thread_per_request(app, server.base_url, isbns)),
+			("asyncio engine", bench_async_engine(server.base_url, isbns, args.concurrency)),
+		]:
+			print(f"{name:<20} {len(isbns)} lookups in {elapsed:.2f}s ({len(isbns) / elapsed:.1f} lookups/s, {failures} failed)")
@@ -0,0 +1,110 @@
+import os
+import json
+import uuid
+import random
+import argparse
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PATH = os.path.join(REPO_DIR, "data", "books.json")
+
+TEXT_FIELDS = ["title", "authors", "publisher", "description"]
+
+## Used when there is no real collection to learn the field lengths from
+DEFAULT_LENGTHS = {
+	"title": [17, 24, 31, 38, 45, 52, 60, 82],
+	"authors": [4, 9, 12, 14, 17, 21, 24],
+	"publisher": [7, 10, 13, 15, 19, 46],
+	"description": [0, 0, 180, 420, 650, 900, 1300, 2474],
+}
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+LANGUAGES = ["English"] * 17 + ["German", "French", "Turkish"]
+
+WORDS = (
+	"the of and a history science guide complete modern art war world life new introduction edition "
+	"classic stories collected essays volume principles practice theory handbook biology physics "
+	"chemistry mathematics philosophy novel poems letters journey empire kingdom secret garden night "
+	"day river house city star light dark shadow ocean mountain winter summer children young old "
+	"press books house publishing media university oxford cambridge penguin random harper vintage "
+	"john mary james anna david sarah michael elena robert maria smith jones brown taylor wilson "
+	"ships from amazon sold by returns refund replacement within days receipt read more reviews"
+).split()
+
+
+def learn_lengths(sample_path: str = SAMPLE_PATH) -> dict:
+	try:
+		with open(sample_path, mode="r", encoding="utf-8") as file:
+			documents = json.load(file)
+	except (FileNotFoundError, json.JSONDecodeError):
+		documents = []
+
+	lengths = {}
+	for field in TEXT_FIELDS:
+		observed = [len(str(doc.get(field, ""))) for doc in documents]
+		lengths[field] = observed or DEFAULT_LENGTHS[field]
+	return lengths
+
+
+class LibraryGenerator:
+
+	def __init__(self, seed: int = 0, sample_path: str = SAMPLE_PATH):
+		self.random = random.Random(seed)
+		self.lengths = learn_lengths(sample_path)
+
+		## Text is sliced out of one long run of words, building every field word by word is far too slow at 1M books
+		self.corpus = " ".join(self.random.choice(WORDS) for _ in range(200_000))
+
+	def text(self, field: str) -> str:
+		## Resample the real lengths with some jitter so sizes spread around the observed ones
+		length = int(self.random.choice(self.lengths[field]) * self.random.uniform(0.75, 1.25))
+		if length <= 0:
+			return ""
+
+		start = self.corpus.find(" ", self.random.randrange(len(self.corpus) - length - 1)) + 1
+		return self.corpus[start:start + length].strip().capitalize()
+
+	def isbns(self) -> tuple:
+		body = f"{self.random.randrange(10 ** 9):09d}"
+
+		ean = "978" + body
+		ean_check = (10 - sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(ean)) % 10) % 10
+
+		isbn10_check = (11 - sum(int(digit) * (10 - i) for i, digit in enumerate(body)) % 11) % 11
+		isbn10 = body + ("X" if isbn10_check == 10 else str(isbn10_check))
+
+		return isbn10, f"978-{body}{ean_check}"
+
+	def book(self) -> dict:
+		isbn10, isbn13 = self.isbns()
+		page_count = self.random.randrange(48, 1400)
+
+		return {
+			"title": self.text("title") or "Untitled",
+			"authors": self.text("authors"),
+			"publisher": self.text("publisher"),
+			"publicationDate": f"{self.random.choice(MONTHS)} {self.random.randrange(1, 29)}, {self.random.randrange(1950, 2025)}",
+			"isbn10": isbn10,
+			"isbn13": isbn13,
+			"pageCount": f"{page_count} pages" if self.random.random() < 0.85 else "",
+			"language": self.random.choice(LANGUAGES),
+			"genres": "",
+			"description": self.text("description"),
+			"_id": uuid.UUID(int=self.random.getrandbits(128)).hex,
+		}
+
+	def library(self, count: int) -> list:
+		return [self.book() for _ in range(count)]
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Write a synthetic books.json shaped like the real collection")
+	parser.add_argument("count", type=int, help="Number of books, e.g. 1000 to 1000000")
+	parser.add_argument("output", help="Path of the collection file to write")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	documents = LibraryGenerator(seed=args.seed).library(args.count)
+	with open(args.output, mode="w", encoding="utf-8") as file:
+		json.dump(documents, file, ensure_ascii=False, indent=None)
+
+	print(f"[INFO] - {len(documents)} books written to '{args.output}' ({os.path.getsize(args.output) / 1024 / 1024:.1f} MB)")
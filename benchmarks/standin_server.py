@@ -0,0 +1,73 @@
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+
+def load_pages(pages_dir: str = PAGES_DIR) -> list:
+	pages = []
+	for name in sorted(os.listdir(pages_dir)):
+		if name.endswith(".html"):
+			with open(os.path.join(pages_dir, name), mode="rb") as file:
+				pages.append(file.read())
+	return pages
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+
+	## Hedged and cancelled lookups drop their connections, that is expected here
+	def handle_error(self, request, client_address):
+		pass
+
+
+class StandInServer:
+
+	def __init__(self, pages: list = None, latency: float = 0.0, status: int = 200, content_type: str = "text/html; charset=utf-8"):
+		self.pages = pages or load_pages()
+		self.latency = latency
+		self.status = status
+		self.content_type = content_type
+		self.requests = 0
+		self._lock = threading.Lock()
+
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"
+
+			def do_GET(self):
+				with server._lock:
+					server.requests += 1
+					page = server.pages[server.requests % len(server.pages)]
+
+				if server.latency:
+					time.sleep(server.latency)
+
+				self.send_response(server.status)
+				self.send_header("Content-Type", server.content_type)
+				self.send_header("Content-Length", str(len(page)))
+				self.end_headers()
+				self.wfile.write(page)
+
+			def log_message(self, format, *args):
+				pass
+
+		self._httpd = QuietHTTPServer(("127.0.0.1", 0), Handler)
+		self._httpd.daemon_threads = True
+		self._thread = None
+
+	@property
+	def base_url(self) -> str:
+		return f"http://127.0.0.1:{self._httpd.server_port}/dp/"
+
+	def __enter__(self):
+		self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc):
+		self._httpd.shutdown()
+		self._httpd.server_close()
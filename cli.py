@@ -0,0 +1,233 @@
+import os
+import sys
+import csv
+import json
+import argparse
+import contextlib
+
+from core import BasicDB, BOOK_FIELDS, document_isbn13
+from exporters import EXPORT_FORMATS, export, filter_documents
+
+## Scraping, providers and Qt stay unimported unless a command needs them, so quick commands start fast
+ROOT_DIR = os.path.abspath(__file__)
+
+def log(message: str):
+	## stdout carries data in pipelines, everything else goes to stderr
+	print(message, file=sys.stderr)
+
+
+def open_db(collection: str) -> BasicDB:
+	with contextlib.redirect_stdout(sys.stderr):
+		return BasicDB(collection_name=collection, root_dir=ROOT_DIR)
+
+
+def rebuild_search_index(db: BasicDB):
+	from search_index import SearchIndex
+
+	## The GUI maps this file as it is when it matches the collection, instead of building it on start
+	search_index = SearchIndex(db.file_path)
+	search_index.remove_stale_builds()
+
+	with db.lock:
+		version = db.version()
+		documents = db.find()
+
+	with contextlib.redirect_stdout(sys.stderr):
+		search_index.install(search_index.build(documents, version), documents, version)
+
+
+def read_documents(path: str) -> list:
+	file = sys.stdin if path == "-" else open(path, mode="r", encoding="utf-8", newline="")
+	with file:
+		if path.endswith(".csv"):
+			return list(csv.DictReader(file))
+
+		text = file.read()
+		if text.lstrip().startswith("["):
+			return json.loads(text)
+		return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def command_import(args):
+	db = open_db(args.collection)
+
+	existing = {document_isbn13(doc) for doc in db.find()}
+	existing.discard("")
+
+	documents = []
+	skipped = 0
+	for doc in read_documents(args.file):
+		if not isinstance(doc, dict):
+			skipped += 1
+			continue
+
+		## The table view expects every field to be there and every value to be text
+		document = {field: str(doc.get(field) or "") for field in BOOK_FIELDS}
+		key = document_isbn13(document)
+
+		if key and key in existing and not args.keep_duplicates:
+			skipped += 1
+			continue
+
+		existing.add(key)
+		documents.append(document)
+
+	if documents:
+		with contextlib.redirect_stdout(sys.stderr):
+			db.create_many(documents)
+		rebuild_search_index(db)
+
+	log(f"[INFO] - Imported {len(documents)} books, skipped {skipped}")
+
+
+def parse_where(conditions: list) -> dict:
+	query = {}
+	for condition in conditions or []:
+		field, separator, value = condition.partition("=")
+		if not separator:
+			raise SystemExit(f"[ERROR] - --where expects field=value, got '{condition}'")
+		query[field] = value
+	return query
+
+
+def command_export(args):
+	documents = filter_documents(open_db(args.collection).iter_documents(), parse_where(args.where), args.search)
+	fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+
+	with open(args.output, mode="w", encoding="utf-8", newline="") if args.output else contextlib.nullcontext(sys.stdout) as output:
+		count = export(documents, output, args.format, fields)
+
+	log(f"[INFO] - Exported {count} books")
+
+
+def command_search(args):
+	documents = filter_documents(open_db(args.collection).iter_documents(), search_text=args.text)
+	export(documents, sys.stdout, "jsonl" if args.json else "table", header=False)
+
+
+def command_reindex(args):
+	from scraping import LocalDumpProvider, ProviderChain
+
+	rebuild_search_index(open_db(args.collection))
+
+	for dump_path in args.dumps or ProviderChain.env_dump_paths():
+		LocalDumpProvider(dump_path).build_index()
+
+
+def command_compact(args):
+	db = open_db(args.collection)
+	result = db.compact()
+	rebuild_search_index(db)
+	log(
+		f"[INFO] - {db.collection_name}.json: {result['documents_before']} -> {result['documents_after']} documents, "
+		f"{result['bytes_before'] / 1024:.0f} KB -> {result['bytes_after'] / 1024:.0f} KB"
+	)
+
+	if not args.keep_cache:
+		from scraping import ScraperCache
+		log(f"[INFO] - Pruned {ScraperCache(root_dir=ROOT_DIR).prune()} scraper cache entries")
+
+
+def command_clean(args):
+	from maintenance import CollectionCleaner
+
+	cleaner = CollectionCleaner(open_db(args.collection), workers=args.workers)
+	with contextlib.redirect_stdout(sys.stderr):
+		report = cleaner.plan() if args.dry_run else cleaner.apply()
+
+	log(cleaner.summary())
+	if not args.dry_run:
+		rebuild_search_index(cleaner.db)
+
+	if args.report:
+		with open(args.report, mode="w", encoding="utf-8") as file:
+			json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def command_enrich(args):
+	from scraping import BatchEnricher, ProviderChain, ScraperCache
+
+	isbns = sys.stdin.read().replace(",", " ").replace(";", " ").split() if args.file == "-" else args.file
+
+	provider_chain = ProviderChain.from_env()
+	for provider in provider_chain.providers:
+		if provider.is_local:
+			provider.ensure_index()
+
+	enricher = BatchEnricher(
+		isbns,
+		open_db(args.collection),
+		cache=ScraperCache(root_dir=ROOT_DIR),
+		offline=args.offline or os.environ.get("HOLOCRON_OFFLINE") == "1",
+		max_workers=args.workers,
+		requests_per_second=args.requests_per_second,
+		provider_chain=provider_chain,
+	)
+	enricher.signals.progress.connect(lambda done, total: log(f"[INFO] - Enriching books: {done}/{total}"))
+	enricher.signals.error.connect(lambda _isbn, error: log(f"[ERROR] - {_isbn}: {error}"))
+	enricher.signals.finished.connect(lambda inserted: log(f"[INFO] - Batch enrichment finished, {inserted} books added"))
+
+	with contextlib.redirect_stdout(sys.stderr):
+		try:
+			enricher.run()
+		except KeyboardInterrupt:
+			## Everything fetched so far is committed and the checkpoint lets the next run resume
+			enricher.stop()
+			return 130
+
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(prog="holocron", description="Manage the Holocron library without the GUI")
+	parser.add_argument("--collection", default="books", help="Collection name under data/ (default: books)")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	command = commands.add_parser("import", help="Add books from a JSON, JSON-lines or CSV file ('-' reads stdin)")
+	command.add_argument("file")
+	command.add_argument("--keep-duplicates", action="store_true", help="Also add books whose ISBN-13 is already in the library")
+	command.set_defaults(handler=command_import)
+
+	command = commands.add_parser("export", help="Stream the library as CSV, JSON lines, JSON or the four table columns")
+	command.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+	command.add_argument("--fields", help="Comma separated fields to write, e.g. title,authors,isbn13")
+	command.add_argument("--where", action="append", metavar="FIELD=VALUE", help="Only books whose field equals the value, can be repeated")
+	command.add_argument("--search", help="Only books containing this text in any field, like the search bar")
+	command.add_argument("--output", "-o", help="File to write instead of stdout")
+	command.set_defaults(handler=command_export)
+
+	command = commands.add_parser("search", help="Print the books matching a search, like the search bar")
+	command.add_argument("text")
+	command.add_argument("--json", action="store_true", help="Print whole documents as JSON lines instead of table rows")
+	command.set_defaults(handler=command_search)
+
+	command = commands.add_parser("reindex", help="Rebuild the collection's search index and the ISBN index of local metadata dumps")
+	command.add_argument("dumps", nargs="*", help="Dump files (default: HOLOCRON_DUMPS, none when it is not set)")
+	command.set_defaults(handler=command_reindex)
+
+	command = commands.add_parser("compact", help="Rewrite the collection without duplicates and prune the scraper cache")
+	command.add_argument("--keep-cache", action="store_true", help="Leave the scraper cache alone")
+	command.set_defaults(handler=command_compact)
+
+	command = commands.add_parser("clean", help="Normalize ISBNs, strip scraped boilerplate and merge books with the same ISBN")
+	command.add_argument("--dry-run", action="store_true", help="Only report what would change")
+	command.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+	command.add_argument("--report", help="Also write the report as JSON to this file")
+	command.set_defaults(handler=command_clean)
+
+	command = commands.add_parser("enrich", help="Look up a list of ISBNs and add the books ('-' reads stdin)")
+	command.add_argument("file")
+	command.add_argument("--workers", type=int, default=4)
+	command.add_argument("--requests-per-second", type=float, default=1.0)
+	command.add_argument("--offline", action="store_true", help="Only use the scraper cache and local dumps")
+	command.set_defaults(handler=command_enrich)
+
+	return parser
+
+
+if __name__ == "__main__":
+	args = build_parser().parse_args()
+	try:
+		sys.exit(args.handler(args) or 0)
+	except BrokenPipeError:
+		## The reader of the pipeline went away, e.g. `| head`
+		os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+		sys.exit(1)
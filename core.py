@@ -0,0 +1,564 @@
+import os
+import json
+import errno
+import uuid
+import copy
+import time
+import random
+import bisect
+import cProfile
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+import isbnlib
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+	import msvcrt
+
+
+class RollingHistogram:
+
+	## Span durations in milliseconds, the last bucket takes everything slower
+	TIME_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+	DEPTH_BUCKETS = [0, 1, 2, 4, 8, 16, 32, 64, 128]
+
+	def __init__(self, window: int = 1024, buckets: list = None):
+		self.samples = deque(maxlen=window)
+		self.buckets = buckets or self.TIME_BUCKETS
+		self.count = 0
+		self.total = 0.0
+
+	def add(self, value: float):
+		self.samples.append(value)
+		self.count += 1
+		self.total += value
+
+	def snapshot(self) -> dict:
+		ordered = sorted(self.samples)
+		if not ordered:
+			return {"count": self.count}
+
+		def percentile(fraction):
+			return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+		## Buckets and percentiles cover the last `window` samples only, count and total the whole run
+		buckets = {}
+		lower = 0
+		for bound in self.buckets:
+			upper = bisect.bisect_right(ordered, bound)
+			buckets[f"<={bound}"] = upper - lower
+			lower = upper
+		buckets[f">{self.buckets[-1]}"] = len(ordered) - lower
+
+		return {
+			"count": self.count,
+			"total": self.total,
+			"window": len(ordered),
+			"mean": sum(ordered) / len(ordered),
+			"p50": percentile(0.50),
+			"p95": percentile(0.95),
+			"p99": percentile(0.99),
+			"max": ordered[-1],
+			"buckets": buckets,
+		}
+
+
+class Metrics:
+
+	def __init__(self, window: int = 1024, profile_dir: str = None):
+		self.window = window
+		self._lock = threading.Lock()
+		self._local = threading.local()
+		self._spans = {}
+		self._gauges = {}
+		self._levels = {}
+		self._watches = {}
+
+		## HOLOCRON_PROFILE_SLOW_MS turns on cProfile for a sample of spans and keeps the profiles of slow ones
+		slow_ms = os.environ.get("HOLOCRON_PROFILE_SLOW_MS")
+		self.slow_ms = float(slow_ms) if slow_ms else None
+		self.sample_rate = float(os.environ.get("HOLOCRON_PROFILE_SAMPLE", "0.25"))
+		self.profile_dir = profile_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles")
+		self.max_profiles = 50
+		self.profiles = deque()
+
+	def record(self, name: str, elapsed_ms: float):
+		with self._lock:
+			histogram = self._spans.get(name)
+			if histogram is None:
+				histogram = self._spans[name] = RollingHistogram(self.window)
+			histogram.add(elapsed_ms)
+
+	@contextmanager
+	def span(self, name: str, profile: bool = True):
+		profiler = None
+		## Only the outermost span of a thread is profiled, a second profiler would replace the first
+		if profile and self.slow_ms is not None and not getattr(self._local, "profiling", False) and random.random() < self.sample_rate:
+			profiler = cProfile.Profile()
+			try:
+				profiler.enable()
+				self._local.profiling = True
+			except ValueError:
+				profiler = None
+
+		started = time.perf_counter()
+		try:
+			yield
+		finally:
+			elapsed_ms = (time.perf_counter() - started) * 1000
+			self.record(name, elapsed_ms)
+
+			if profiler:
+				profiler.disable()
+				self._local.profiling = False
+				if elapsed_ms >= self.slow_ms:
+					self._save_profile(name, elapsed_ms, profiler)
+
+	def _save_profile(self, name: str, elapsed_ms: float, profiler: cProfile.Profile):
+		os.makedirs(self.profile_dir, exist_ok=True)
+		path = os.path.join(self.profile_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed_ms)}ms-{uuid.uuid4().hex[:6]}.prof")
+		profiler.dump_stats(path)
+
+		with self._lock:
+			self.profiles.append(path)
+			while len(self.profiles) > self.max_profiles:
+				old_path = self.profiles.popleft()
+				if os.path.exists(old_path):
+					os.remove(old_path)
+
+		print(f"[INFO] - Slow {name} ({elapsed_ms:.0f} ms) profiled to '{path}'")
+
+	def adjust(self, name: str, delta: int):
+		with self._lock:
+			value = self._gauges.get(name, 0) + delta
+			self._gauges[name] = value
+			histogram = self._levels.get(name)
+			if histogram is None:
+				histogram = self._levels[name] = RollingHistogram(self.window, RollingHistogram.DEPTH_BUCKETS)
+			histogram.add(value)
+
+	def watch(self, name: str, read):
+		## Read when a snapshot is taken, for values another object already keeps
+		self._watches[name] = read
+
+	def start(self, pool, runnable, name: str = "threadpool"):
+		## Wraps QThreadPool.start so the time spent waiting for a free thread shows up as queue depth
+		self.adjust(f"{name}.queued", 1)
+
+		def run():
+			self.adjust(f"{name}.queued", -1)
+			self.adjust(f"{name}.active", 1)
+			try:
+				runnable.run()
+			finally:
+				self.adjust(f"{name}.active", -1)
+
+		pool.start(run)
+
+	def snapshot(self) -> dict:
+		with self._lock:
+			spans = {name: histogram.snapshot() for name, histogram in sorted(self._spans.items())}
+			gauges = {name: {"current": self._gauges[name], **histogram.snapshot()} for name, histogram in sorted(self._levels.items())}
+			profiles = list(self.profiles)
+
+		for name, read in self._watches.items():
+			try:
+				gauges[name] = {"current": read()}
+			except Exception as err:
+				gauges[name] = {"error": str(err)}
+
+		return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "spans": spans, "gauges": gauges, "profiles": profiles}
+
+	def export(self, path: str):
+		tmp_path = f"{path}.tmp"
+		with open(tmp_path, mode="w", encoding="utf-8") as file:
+			json.dump(self.snapshot(), file, indent=2)
+		os.replace(tmp_path, path)
+
+
+metrics = Metrics()
+
+
+class FileLock:
+
+	## msvcrt.locking(LK_LOCK) already retries for about 10 s before giving up, so this waits about a minute in all
+	WINDOWS_ATTEMPTS = 6
+	WINDOWS_RETRY_DELAY = 0.5
+
+	def __init__(self, path: str):
+		self.path = path
+		self._lock = threading.RLock()
+		self._depth = 0
+		self._file = None
+
+	def _lock_windows(self):
+		for attempt in range(self.WINDOWS_ATTEMPTS):
+			try:
+				self._file.seek(0)
+				msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+				return
+			except OSError as e:
+				## Only contention is retried, a bad handle or a denied file is a real error
+				if e.errno != errno.EDEADLOCK:
+					raise
+			time.sleep(self.WINDOWS_RETRY_DELAY)
+		raise TimeoutError(f"'{self.path}' is still locked by another process")
+
+	def __enter__(self):
+		## Advisory, every process that writes through BasicDB takes it, re-entrant within a process
+		self._lock.acquire()
+		if self._depth == 0:
+			try:
+				self._file = open(self.path, mode="a+b")
+				if fcntl:
+					fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+				else:
+					self._lock_windows()
+			except BaseException:
+				if self._file:
+					self._file.close()
+					self._file = None
+				self._lock.release()
+				raise
+		self._depth += 1
+		return self
+
+	def __exit__(self, *exc_info):
+		self._depth -= 1
+		if self._depth == 0:
+			if fcntl:
+				fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+			else:
+				self._file.seek(0)
+				msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+			self._file.close()
+			self._file = None
+		self._lock.release()
+
+
+def locked(method):
+	## Read-modify-write operations hold the collection lock from the read to the write
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		with self.lock:
+			return method(self, *args, **kwargs)
+	return wrapper
+
+
+## Every write of a collection file uses these, so the file stays as small as compact() leaves it
+JSON_SEPARATORS = (",", ":")
+
+## Fields of a book document, as BookScraper.to_document builds them
+BOOK_FIELDS = ["title", "authors", "publisher", "publicationDate", "isbn10", "isbn13", "pageCount", "language", "genres", "description"]
+
+
+def canonical_isbn13(value: str) -> str:
+	## ISBN-13 digits, so 0-13-648687-8, 0136486878 and 978-0136486879 are one book, empty when it is not a valid ISBN
+	value = isbnlib.canonical(str(value or ""))
+	if isbnlib.is_isbn10(value):
+		return isbnlib.to_isbn13(value)
+	if isbnlib.is_isbn13(value):
+		return value
+	return ""
+
+
+def document_isbn13(doc: dict) -> str:
+	return canonical_isbn13(doc.get("isbn13")) or canonical_isbn13(doc.get("isbn10"))
+
+
+class BasicDB:
+
+    def __init__(self, collection_name: str, root_dir : str):
+        self.collection_name = collection_name
+
+        self.base_dir = os.path.join(os.path.dirname(root_dir), "data")
+        self.file_path = os.path.join(self.base_dir, f"{self.collection_name}.json")
+
+        ## Every write bumps the change sequence, documents carry their own revision in _rev
+        self.lock = FileLock(f"{self.file_path}.lock")
+        self.sequence_path = f"{self.file_path}.seq"
+
+        self._ensure_data_directory_exists()
+        self._ensure_collection_file_exists()
+        
+
+
+    def _ensure_data_directory_exists(self):
+        if not os.path.exists(self.base_dir):
+            os.makedirs(self.base_dir)
+            print(f"[INFO] - '{self.base_dir}' directory was created.")
+            
+
+    def _read_all_documents(self) -> list:
+        try:
+            with metrics.span("db.read"), open(self.file_path, mode="r", encoding="utf-8") as file:
+                return json.load(file)
+            
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        
+    @locked
+    def _write_all_documents(self, documents: list):
+        try:
+            ## Written aside and swapped in, readers in other processes never see half a file
+            tmp_path = f"{self.file_path}.tmp"
+            with metrics.span("db.write"), open(tmp_path, mode="w", encoding="utf-8") as file:
+                json.dump(documents, file, ensure_ascii=False, indent=None, separators=JSON_SEPARATORS)
+            os.replace(tmp_path, self.file_path)
+
+            sequence = self.sequence() + 1
+            with open(f"{self.sequence_path}.tmp", mode="w", encoding="utf-8") as file:
+                file.write(str(sequence))
+            os.replace(f"{self.sequence_path}.tmp", self.sequence_path)
+        
+        except IOError as err:
+            print(f"[ERROR] - {self.collection_name}.json dosyasına yazma hatası: {err}")
+            raise
+
+
+    def sequence(self) -> int:
+        try:
+            with open(self.sequence_path, mode="r", encoding="utf-8") as file:
+                return int(file.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+
+    def version(self) -> tuple:
+        ## The file stat catches writers that bypass BasicDB and so never bump the sequence
+        try:
+            stat = os.stat(self.file_path)
+            return (self.sequence(), stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return (self.sequence(), 0, 0)
+
+
+    def changes(self, known_docs: list, compare_contents: bool = False) -> tuple:
+
+        known = {doc["_id"]: doc for doc in known_docs}
+
+        ## Revisions are enough when every writer went through BasicDB, anything else needs the contents compared
+        changed = []
+        for doc in self._read_all_documents():
+            old = known.pop(doc["_id"], None)
+            if old is None or old.get("_rev") != doc.get("_rev") or ((compare_contents or "_rev" not in doc) and old != doc):
+                changed.append(doc)
+
+        ## Whatever is left in known was removed by the other writer
+        return changed, list(known)
+
+
+    @locked
+    def _ensure_collection_file_exists(self):
+        if not os.path.exists(self.file_path):
+            self._write_all_documents([])
+            print(f"[INFO] - '{self.collection_name}.json' file was created.")
+
+
+    # CREATE Opearations
+
+    @locked
+    def create(self, doc: dict) -> dict:
+        
+        if not isinstance(doc, dict):
+            raise ValueError("Documents must be a dictionary.")
+        
+        _id = uuid.uuid4().hex
+        
+        documents = self._read_all_documents()
+
+        new_doc = copy.deepcopy(doc)
+        new_doc["_id"] = _id
+        new_doc["_rev"] = 1
+
+        documents.append(new_doc)
+
+        self._write_all_documents(documents)
+        
+        print(f"[INFO] - Belge eklendi: {new_doc.get('title', new_doc.get('name', new_doc['_id']))}")
+        
+        return new_doc
+
+
+    @locked
+    def create_many(self, docs: list) -> list:
+
+        if not all(isinstance(doc, dict) for doc in docs):
+            raise ValueError("Documents must be a dictionary.")
+
+        documents = self._read_all_documents()
+
+        new_docs = []
+        for doc in docs:
+            new_doc = copy.deepcopy(doc)
+            new_doc["_id"] = uuid.uuid4().hex
+            new_doc["_rev"] = 1
+            new_docs.append(new_doc)
+
+        documents.extend(new_docs)
+
+        self._write_all_documents(documents)
+
+        print(f"[INFO] - {len(new_docs)} belge eklendi.")
+
+        return new_docs
+        
+    
+    # READ Operations
+
+    def find(self, query: dict=None) -> list:
+        
+        documents = self._read_all_documents()
+
+        if not query:
+            return documents
+
+        results = []
+        for doc in documents:
+            query_bools = []
+            for key, value in query.items():
+                if key in doc and doc[key] == value:
+                    query_bools.append(True)
+                else:
+                    query_bools.append(False)
+            if all(query_bools):
+                results.append(doc)
+
+        # results = [
+        #     doc for doc in documents
+        #     if all(key in doc and doc[key] == value for key, value in query.items())
+        # ]
+
+        if results:
+            return results
+
+        return None
+    
+    
+    def iter_documents(self, chunk_size: int = 1 << 20):
+
+        ## Decodes the top-level array one document at a time, memory is bounded by the largest document
+        decoder = json.JSONDecoder()
+
+        try:
+            file = open(self.file_path, mode="r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+
+        with metrics.span("db.stream"), file:
+            buffer = file.read(chunk_size).lstrip()
+            if not buffer.startswith("["):
+                return
+
+            position = 1
+            at_end = False
+
+            while True:
+                ## Skip the separators between documents
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+
+                if position < len(buffer) and buffer[position] == "]":
+                    return
+
+                try:
+                    doc, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if at_end:
+                        raise
+
+                    ## The next document runs past the buffer, drop what was consumed and read on
+                    chunk = file.read(chunk_size)
+                    at_end = not chunk
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    continue
+
+                position = end
+                yield doc
+
+
+    def find_by_id(self, _id: str) -> dict | None:
+        
+        documents = self._read_all_documents()
+
+        # result = [
+        #     doc for doc in documents if doc and doc["_id"] == _id
+        # ]
+
+        result = None
+
+        for doc in documents:
+            if doc["_id"] == _id:
+                result = doc
+            
+        return result
+
+
+    @locked
+    def compact(self) -> dict:
+
+        documents = self._read_all_documents()
+
+        ## Entries that are not documents are dropped, the last copy of a duplicated _id wins
+        compacted = {}
+        for doc in documents:
+            if not isinstance(doc, dict):
+                continue
+            if not doc.get("_id"):
+                doc["_id"] = uuid.uuid4().hex
+            compacted[doc["_id"]] = doc
+
+        size_before = os.path.getsize(self.file_path)
+
+        self._write_all_documents(list(compacted.values()))
+
+        return {
+            "documents_before": len(documents),
+            "documents_after": len(compacted),
+            "bytes_before": size_before,
+            "bytes_after": os.path.getsize(self.file_path),
+        }
+
+
+    # UPDATE Operations
+
+    @locked
+    def find_by_id_and_update(self, _id: str, update: dict) -> dict | None:
+
+        documents = self._read_all_documents()
+        
+        doc = self.find_by_id(_id)
+
+        if not doc:
+            return None
+
+        doc_index = documents.index(doc)
+
+        update["_id"] = _id
+        update["_rev"] = doc.get("_rev", 0) + 1
+
+        documents[doc_index] = update
+
+        self._write_all_documents(documents)
+
+        return update
+
+
+    # DELETE Operations
+
+    @locked
+    def find_by_id_and_delete(self, _id: str):
+        
+        documents = self._read_all_documents()
+        
+        doc = self.find_by_id(_id)
+
+        doc_index = documents.index(doc)
+
+        documents.pop(doc_index)
+
+        self._write_all_documents(documents)
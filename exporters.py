@@ -0,0 +1,113 @@
+import csv
+import json
+
+from core import BOOK_FIELDS
+from search_index import isbn_forms, matches
+
+## The four columns of the main window's table, in the same order
+TABLE_COLUMNS = [("title", "Title"), ("authors", "Author"), ("publisher", "Publisher"), ("isbn13", "ISBN-13")]
+
+EXPORT_FORMATS = ["csv", "jsonl", "json", "table"]
+
+
+class ChunkedWriter:
+
+	def __init__(self, output, chunk_size: int = 64 * 1024):
+		self.output = output
+		self.chunk_size = chunk_size
+		self._parts = []
+		self._size = 0
+
+	def write(self, text: str):
+		## Many small writes are gathered and handed to the output in one go
+		self._parts.append(text)
+		self._size += len(text)
+		if self._size >= self.chunk_size:
+			self.flush()
+
+	def flush(self):
+		if self._parts:
+			self.output.write("".join(self._parts))
+			self._parts.clear()
+			self._size = 0
+		self.output.flush()
+
+
+def filter_documents(documents, query: dict = None, search_text: str = None):
+	## query matches whole field values like BasicDB.find, search_text finds the same books the search bar does
+	search_text = search_text.lower() if search_text else None
+	isbn = isbn_forms(search_text) if search_text else None
+
+	for doc in documents:
+		if query and not all(key in doc and doc[key] == value for key, value in query.items()):
+			continue
+		if search_text and not matches(doc, search_text, isbn):
+			continue
+		yield doc
+
+
+def write_csv(documents, writer: ChunkedWriter, fields: list) -> int:
+	rows = csv.writer(writer)
+	rows.writerow(fields)
+
+	count = 0
+	for doc in documents:
+		rows.writerow([doc.get(field, "") for field in fields])
+		count += 1
+	return count
+
+
+def write_jsonl(documents, writer: ChunkedWriter, fields: list = None) -> int:
+	count = 0
+	for doc in documents:
+		if fields:
+			doc = {field: doc.get(field, "") for field in fields}
+		writer.write(json.dumps(doc, ensure_ascii=False))
+		writer.write("\n")
+		count += 1
+	return count
+
+
+def write_json(documents, writer: ChunkedWriter, fields: list = None) -> int:
+	writer.write("[")
+	count = 0
+	for doc in documents:
+		if fields:
+			doc = {field: doc.get(field, "") for field in fields}
+		writer.write("," if count else "")
+		writer.write(json.dumps(doc, ensure_ascii=False))
+		count += 1
+	writer.write("]\n")
+	return count
+
+
+def write_table(documents, writer: ChunkedWriter, fields: list = None, header: bool = True) -> int:
+	fields = fields or [field for field, _ in TABLE_COLUMNS]
+	titles = dict(TABLE_COLUMNS)
+
+	## Tab separated, widths cannot be aligned without holding every row
+	if header:
+		writer.write("\t".join(titles.get(field, field) for field in fields) + "\n")
+
+	count = 0
+	for doc in documents:
+		writer.write("\t".join(str(doc.get(field, "")).replace("\t", " ").replace("\n", " ") for field in fields) + "\n")
+		count += 1
+	return count
+
+
+def export(documents, output, export_format: str = "jsonl", fields: list = None, header: bool = True, chunk_size: int = 64 * 1024) -> int:
+	writer = ChunkedWriter(output, chunk_size)
+
+	try:
+		if export_format == "csv":
+			return write_csv(documents, writer, fields or BOOK_FIELDS + ["_id"])
+		if export_format == "jsonl":
+			return write_jsonl(documents, writer, fields)
+		if export_format == "json":
+			return write_json(documents, writer, fields)
+		if export_format == "table":
+			return write_table(documents, writer, fields, header)
+		raise ValueError(f"Unknown export format '{export_format}'")
+	finally:
+		writer.flush()
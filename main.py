@@ -1,17 +1,31 @@
 import sys
 import os
-import json
-import uuid
-import copy
-import requests
-from bs4 import BeautifulSoup
-from pyzbar.pyzbar import decode
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pyzbar.pyzbar import decode, ZBarSymbol
 import cv2
+import numpy as np
 import isbnlib
+from core import BasicDB, canonical_isbn13, document_isbn13, metrics
+from maintenance import CollectionCleaner
+from search_index import SearchIndex, changes, isbn_forms, matches
+from scraping import (
+	ScraperCache,
+	RateLimiter,
+	InFlightRegistry,
+	BookScraper,
+	ProviderChain,
+	AsyncScraperEngine,
+	BatchEnricher,
+	CoverStore,
+)
 from PySide6.QtWidgets import (
 	QApplication,
 	QMainWindow,
 	QDialog,
+	QFileDialog,
 	QMessageBox,
 	QWidget,
 	QVBoxLayout,
@@ -23,14 +37,20 @@ from PySide6.QtWidgets import (
 	QCheckBox,
 	QTableView,
 	QAbstractItemView,
-	QHeaderView
+	QHeaderView,
+	QListWidget,
+	QListWidgetItem
 )
 from PySide6.QtCore import (
 	Qt,
 	QAbstractTableModel,
 	QModelIndex,
 	QObject,
+	QSize,
+	QBuffer,
+	QIODevice,
 	QTimer,
+	QFileSystemWatcher,
 	QThread,
 	QMutex,
 	QRunnable,
@@ -41,31 +61,574 @@ from PySide6.QtCore import (
 from PySide6.QtGui import (
 	QImage,
 	QPixmap,
+	QFont,
+	QKeySequence,
+	QShortcut,
 )
 
+
+class FrameBufferRing:
+
+	def __init__(self, count: int):
+		self.count = count
+		self.buffers = []
+		self._owners = [0] * count
+		self._next = 0
+		self._lock = threading.Lock()
+
+		self.allocations = 0
+		self.exhausted = 0
+
+	def allocate(self, shape: tuple) -> bool:
+		with self._lock:
+			if self.buffers and self.buffers[0].shape == shape:
+				return True
+
+			## Buffers still handed out must never be freed under their owner
+			if any(self._owners):
+				return False
+
+			self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.count)]
+			self.allocations += self.count
+			return True
+
+	def acquire(self) -> int | None:
+		with self._lock:
+			for step in range(self.count):
+				index = (self._next + step) % self.count
+				if self._owners[index] == 0:
+					self._owners[index] = 1
+					self._next = index + 1
+					return index
+
+			self.exhausted += 1
+			return None
+
+	def retain(self, index: int):
+		with self._lock:
+			self._owners[index] += 1
+
+	def release(self, index: int):
+		with self._lock:
+			if self._owners[index] > 0:
+				self._owners[index] -= 1
+
+
+class LatestFrameSlot:
+
+	def __init__(self, on_drop=None):
+		self._condition = threading.Condition()
+		self._frame = None
+		self._closed = False
+		self.on_drop = on_drop
+
+		self.produced = 0
+		self.dropped = 0
+
+	def put(self, frame):
+		with self._condition:
+			## The consumer only ever wants the newest frame, an unread one is simply replaced
+			if self._frame is not None:
+				self.dropped += 1
+				if self.on_drop:
+					self.on_drop(self._frame)
+			self._frame = frame
+			self.produced += 1
+			self._condition.notify()
+
+	def take(self, timeout: float = None):
+		with self._condition:
+			self._condition.wait_for(lambda: self._frame is not None or self._closed, timeout)
+			frame, self._frame = self._frame, None
+			return frame
+
+	def close(self):
+		with self._condition:
+			self._closed = True
+			if self._frame is not None and self.on_drop:
+				self.on_drop(self._frame)
+			self._frame = None
+			self._condition.notify_all()
+
+
+class BarcodeDecoder:
+
+	## An EAN-13 symbol is 95 modules wide, zbar needs roughly two pixels per module
+	EAN13_MODULES = 95
+	MIN_MODULE_PIXELS = 2.0
+
+	def __init__(self, scale: float = 0.5, roi_margin: float = 0.6, full_scan_interval: int = 15, full_resolution_interval: int = 5):
+		self.scale = scale
+		self.min_scale = scale
+		self.roi_margin = roi_margin
+		self.full_scan_interval = full_scan_interval
+		self.full_resolution_interval = full_resolution_interval
+
+		## Last barcode position in full frame coordinates, None once it is lost
+		self.last_rect = None
+		self._frames_since_full_scan = 0
+		self._misses_since_full_resolution = 0
+
+		self.frames = 0
+		self.hits = 0
+		self.attempts = {"roi": 0, "downscaled": 0, "full": 0}
+		self.decode_time = 0.0
+
+	@staticmethod
+	def _decode_ean13(image, offset: tuple = (0, 0), scale: float = 1.0):
+		for decoded_barcode in decode(image, symbols=[ZBarSymbol.EAN13]):
+			if decoded_barcode and decoded_barcode.type == "EAN13":
+				(x, y, w, h) = decoded_barcode.rect
+				rect = (int(x / scale) + offset[0], int(y / scale) + offset[1], int(w / scale), int(h / scale))
+				return decoded_barcode.data.decode("utf-8"), rect
+		return None
+
+	def _roi(self, gray):
+		(x, y, w, h) = self.last_rect
+		margin_x, margin_y = int(w * self.roi_margin), int(h * self.roi_margin)
+		height, width = gray.shape[:2]
+
+		x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+		x1, y1 = min(width, x + w + margin_x), min(height, y + h + margin_y)
+
+		return gray[y0:y1, x0:x1], (x0, y0)
+
+	def decode(self, frame):
+		started = time.perf_counter()
+		self.frames += 1
+
+		## EAN-13 only needs luminance
+		gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+		result = None
+		was_tracking = self.last_rect is not None
+
+		if was_tracking and self._frames_since_full_scan < self.full_scan_interval:
+			self.attempts["roi"] += 1
+			roi, offset = self._roi(gray)
+			result = self._decode_ean13(roi, offset)
+			self._frames_since_full_scan += 1
+
+		if result is None:
+			self._frames_since_full_scan = 0
+
+			self.attempts["downscaled"] += 1
+			small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+			result = self._decode_ean13(small, scale=self.scale)
+
+		## Small or distant barcodes can vanish when downscaled, retry at full resolution right after
+		## losing one and every few misses otherwise
+		if result is None:
+			self._misses_since_full_resolution += 1
+			if was_tracking or self._misses_since_full_resolution >= self.full_resolution_interval:
+				self._misses_since_full_resolution = 0
+				self.attempts["full"] += 1
+				result = self._decode_ean13(gray)
+
+		if result:
+			self.hits += 1
+			self._misses_since_full_resolution = 0
+
+			## Downscale only as far as the last seen barcode stays readable, it may be held upright so its long side counts
+			## A degenerate zero-size rect gives nothing to track or size the downscale by
+			barcode_pixels = max(result[1][2], result[1][3])
+			if barcode_pixels > 0:
+				self.last_rect = result[1]
+				self.scale = min(1.0, max(self.min_scale, self.MIN_MODULE_PIXELS * self.EAN13_MODULES / barcode_pixels))
+			else:
+				self.last_rect = None
+		else:
+			self.last_rect = None
+
+		self.decode_time += time.perf_counter() - started
+		return result
+
+	def stats(self) -> dict:
+		return {
+			"frames": self.frames,
+			"hits": self.hits,
+			"decode_rate": self.hits / self.frames if self.frames else 0.0,
+			"ms_per_frame": self.decode_time / self.frames * 1000 if self.frames else 0.0,
+			"attempts": dict(self.attempts),
+		}
+
+
+class ScanConfirmer:
+
+	def __init__(self, confirm_frames: int = 3, cooldown: float = 5.0, max_gap: float = 1.0):
+		self.confirm_frames = confirm_frames
+		self.cooldown = cooldown
+		self.max_gap = max_gap
+
+		self._candidate = None
+		self._candidate_reads = 0
+		self._candidate_seen_at = 0.0
+
+		## Emitted code -> last time it was seen, it stays quiet while the book is held up
+		self._recent = {}
+
+		self.rejected = 0
+		self.suppressed = 0
+		self.confirmed = 0
+
+	@staticmethod
+	def is_bookland_isbn(code: str) -> bool:
+		return code.startswith(("978", "979")) and isbnlib.is_isbn13(code)
+
+	def observe(self, code: str, now: float = None) -> str | None:
+		now = time.monotonic() if now is None else now
+
+		if not self.is_bookland_isbn(code):
+			self.rejected += 1
+			return None
+
+		last_emitted_seen = self._recent.get(code)
+		if last_emitted_seen is not None and now - last_emitted_seen < self.cooldown:
+			self._recent[code] = now
+			self.suppressed += 1
+			return None
+
+		if code == self._candidate and now - self._candidate_seen_at <= self.max_gap:
+			self._candidate_reads += 1
+		else:
+			self._candidate = code
+			self._candidate_reads = 1
+		self._candidate_seen_at = now
+
+		if self._candidate_reads < self.confirm_frames:
+			return None
+
+		self._candidate = None
+		self._candidate_reads = 0
+		self._recent = {recent_code: seen_at for recent_code, seen_at in self._recent.items() if now - seen_at < self.cooldown}
+		self._recent[code] = now
+		self.confirmed += 1
+
+		return code
+
+
+## Frame sources answer the same calls the camera worker makes on cv2.VideoCapture
+class FrameSource:
+
+	is_live = False
+
+	def __init__(self, fps: float = 30.0):
+		self.fps = fps
+		self.opened = True
+
+	@staticmethod
+	def open(spec: str = None) -> "FrameSource":
+		## "camera", "camera:1", "synthetic", "synthetic:9780451524935,...", a directory of images or a video file
+		spec = (spec or "camera").strip()
+		kind, _, argument = spec.partition(":")
+
+		if kind == "camera" and (not argument or argument.isdigit()):
+			return CameraSource(int(argument or 0))
+		if kind == "synthetic":
+			return SyntheticBarcodeSource([code for code in argument.split(",") if code] or None)
+		if os.path.isdir(spec):
+			return ImageDirectorySource(spec)
+		if os.path.isfile(spec):
+			return VideoFileSource(spec)
+
+		raise ValueError(f"Unknown frame source '{spec}'")
+
+	def isOpened(self) -> bool:
+		return self.opened
+
+	def read(self, image=None):
+		raise NotImplementedError
+
+	def grab(self) -> bool:
+		return self.read()[0]
+
+	def get(self, prop: int) -> float:
+		return self.fps if prop == cv2.CAP_PROP_FPS else 0.0
+
+	def release(self):
+		self.opened = False
+
+	def _into(self, frame, image):
+		if image is not None and image.shape == frame.shape:
+			image[...] = frame
+			return image
+		return frame
+
+
+class CameraSource(FrameSource):
+
+	is_live = True
+
+	def __init__(self, index: int = 0):
+		super().__init__(fps=0.0)
+		## DirectShow opens much faster on Windows but does not exist anywhere else
+		backend = cv2.CAP_DSHOW if sys.platform == "win32" else cv2.CAP_ANY
+		self.capture = cv2.VideoCapture(index, backend)
+
+	def isOpened(self) -> bool:
+		return self.capture.isOpened()
+
+	def read(self, image=None):
+		return self.capture.read(image)
+
+	def grab(self) -> bool:
+		return self.capture.grab()
+
+	def get(self, prop: int) -> float:
+		return self.capture.get(prop)
+
+	def release(self):
+		self.capture.release()
+
+
+class VideoFileSource(CameraSource):
+
+	is_live = False
+
+	def __init__(self, path: str):
+		FrameSource.__init__(self, fps=0.0)
+		self.capture = cv2.VideoCapture(path)
+
+
+class ImageDirectorySource(FrameSource):
+
+	EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+	def __init__(self, path: str, fps: float = 30.0):
+		super().__init__(fps)
+		self.paths = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith(self.EXTENSIONS)]
+		self.position = 0
+		self.opened = bool(self.paths)
+		self.shape = None
+
+	def read(self, image=None):
+		while self.opened and self.position < len(self.paths):
+			frame = cv2.imread(self.paths[self.position])
+			self.position += 1
+			if frame is None:
+				continue
+
+			## Every frame must fit the buffers sized from the first one
+			if self.shape is None:
+				self.shape = frame.shape
+			elif frame.shape != self.shape:
+				frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+
+			return True, self._into(frame, image)
+
+		return False, None
+
+
+class SyntheticBarcodeSource(FrameSource):
+
+	DEFAULT_CODES = ["9780451524935", "9780140449136", "9780306406157"]
+
+	## EAN-13 module patterns for the left (odd and even parity) and right halves
+	L_CODES = ["0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011"]
+	G_CODES = [code[::-1].translate(str.maketrans("01", "10")) for code in L_CODES]
+	R_CODES = [code.translate(str.maketrans("01", "10")) for code in L_CODES]
+	PARITY = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+	def __init__(self, codes: list = None, fps: float = 30.0, width: int = 640, height: int = 480, frames_per_code: int = 45, blank_frames: int = 15, noise: int = 12, seed: int = 0):
+		super().__init__(fps)
+		self.codes = codes or self.DEFAULT_CODES
+		self.width = width
+		self.height = height
+		self.frames_per_code = frames_per_code
+		self.blank_frames = blank_frames
+		self.position = 0
+		self.rng = np.random.default_rng(seed)
+
+		self.background = np.full((height, width), 150, dtype=np.uint8)
+		self.patches = [self.render(code) for code in self.codes]
+
+		## A handful of noise planes reused in turn keeps generation cheap
+		self.noise = [self.rng.integers(-noise, noise + 1, size=(height, width), dtype=np.int16) for _ in range(8)]
+
+	@classmethod
+	def modules(cls, code: str) -> str:
+		digits = [int(digit) for digit in code]
+		left = "".join(
+			(cls.L_CODES if parity == "L" else cls.G_CODES)[digit]
+			for parity, digit in zip(cls.PARITY[digits[0]], digits[1:7])
+		)
+		right = "".join(cls.R_CODES[digit] for digit in digits[7:])
+		return "101" + left + "01010" + right + "101"
+
+	def render(self, code: str, module_width: int = 3, bar_height: int = 120, quiet_zone: int = 10):
+		bars = np.array([int(bit) for bit in self.modules(code)], dtype=np.uint8)
+		row = np.repeat((1 - bars) * 255, module_width)
+		row = np.pad(row, quiet_zone * module_width, constant_values=255)
+		patch = np.tile(row, (bar_height + 2 * quiet_zone, 1))
+		patch[:quiet_zone] = 255
+		patch[-quiet_zone:] = 255
+		return patch
+
+	def expected_code(self, position: int) -> str:
+		cycle = self.frames_per_code + self.blank_frames
+		index, offset = divmod(position, cycle)
+		if index >= len(self.codes) or offset >= self.frames_per_code:
+			return None
+		return self.codes[index]
+
+	def read(self, image=None):
+		cycle = self.frames_per_code + self.blank_frames
+		if not self.opened or self.position >= cycle * len(self.codes):
+			return False, None
+
+		index, offset = divmod(self.position, cycle)
+		gray = self.background.copy()
+
+		if offset < self.frames_per_code:
+			## The book drifts across the view like it would in a hand
+			patch = self.patches[index]
+			height, width = patch.shape
+			x = int((self.width - width) * (0.2 + 0.6 * offset / self.frames_per_code))
+			y = (self.height - height) // 2 + int(10 * np.sin(offset / 4))
+			gray[y:y + height, x:x + width] = patch
+
+		gray = np.clip(gray + self.noise[self.position % len(self.noise)], 0, 255).astype(np.uint8)
+		self.position += 1
+
+		return True, self._into(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), image)
+
+
 class CameraWorker(QThread):
 
-	frame = Signal(QImage)
+	frame = Signal(QImage, int)
 	isbn = Signal(str)
 	error = Signal(str)
 	finished = Signal()
 	number = Signal(int)
 	status = Signal(str)  # Status updates
 
-	def __init__(self):
+	## How long a detected barcode rectangle stays drawn on the preview
+	RECT_TTL = 0.5
+
+	## Capture, the latest-frame slot and the decoder each hold at most one frame buffer
+	FRAME_BUFFERS = 4
+	PREVIEW_BUFFERS = 3
+
+	## Above this frame rate previews are scaled with nearest-neighbour instead of bilinear filtering
+	FAST_SCALING_FPS = 45
+
+	def __init__(self, confirm_frames:int=3, cooldown:float=5.0, source:str=None):
 		super().__init__()
 		self.is_running = False
 		self.camera = None
+		self.source = source
+		## Recorded and synthetic sources can be replayed as fast as the decoder keeps up
+		self.paced = True
 		self.is_camera_active = False
+		self.confirm_frames = confirm_frames
+		self.cooldown = cooldown
+		self.confirmer = ScanConfirmer(confirm_frames, cooldown)
+
+		self._frame_slot = None
+		self._last_rect = None
+		self._last_rect_at = 0.0
+		self.decoder = BarcodeDecoder()
+
+		self.preview_size = (200, 200)
+		self._frame_ring = FrameBufferRing(self.FRAME_BUFFERS)
+		self._preview_ring = FrameBufferRing(self.PREVIEW_BUFFERS)
+		self.profile = {}
+		self.read_codes = {}
+		self._started_at = 0.0
+
+	def set_preview_size(self, width: int, height: int):
+		self.preview_size = (width, height)
+
+	def release_preview(self, index: int):
+		if index >= 0:
+			self._preview_ring.release(index)
+
+	def _decode_loop(self):
+		while self.is_running:
+
+			item = self._frame_slot.take(timeout=0.5)
+			if item is None:
+				continue
+
+			index, frame = item
+
+			try:
+				with metrics.span("camera.decode"):
+					decoded = self.decoder.decode(frame)
+			except Exception as e:
+				self.error.emit(f"Decode error: {str(e)}")
+				continue
+			finally:
+				self._frame_ring.release(index)
+
+			if decoded:
+				isbn_code, self._last_rect = decoded
+				self._last_rect_at = time.monotonic()
+
+				self.read_codes[isbn_code] = self.read_codes.get(isbn_code, 0) + 1
+				if self.profile["first_read"] is None:
+					self.profile["first_read"] = time.perf_counter() - self._started_at
+
+				## Only codes read consistently and not emitted recently go downstream
+				if self.confirmer.observe(isbn_code, self._last_rect_at):
+					self.isbn.emit(isbn_code)
+
+	def _emit_preview(self, frame, interpolation: int):
+		started = time.perf_counter()
+
+		## Scale to the preview label here, keeping the aspect ratio, so the GUI thread only blits
+		frame_height, frame_width = frame.shape[:2]
+		scale = min(self.preview_size[0] / frame_width, self.preview_size[1] / frame_height)
+		width, height = max(1, int(frame_width * scale)), max(1, int(frame_height * scale))
+
+		if not self._preview_ring.allocate((height, width, 3)):
+			self.profile["previews_dropped"] += 1
+			return
+
+		index = self._preview_ring.acquire()
+		if index is None:
+			## The GUI still holds every preview buffer, it cannot show this frame in time anyway
+			self.profile["previews_dropped"] += 1
+			return
+
+		preview = self._preview_ring.buffers[index]
+		cv2.resize(frame, (width, height), dst=preview, interpolation=interpolation)
+
+		if self._last_rect and time.monotonic() - self._last_rect_at < self.RECT_TTL:
+			(x, y, w, h) = self._last_rect
+			pt1_rect = (int(x * scale), int(y * scale))
+			pt2_rect = (int((x + w) * scale), int((y + h) * scale))
+
+			cv2.rectangle(
+				img=preview,
+				pt1=pt1_rect,
+				pt2=pt2_rect,
+				thickness=2,
+				color=(0, 0, 255),
+				lineType=cv2.LINE_8
+			)
+
+		bytes_per_line = 3 * width
+		q_img = QImage(preview.data, width, height, bytes_per_line, QImage.Format.Format_BGR888)
+
+		self.profile["previews"] += 1
+		self.profile["preview_scale_time"] += time.perf_counter() - started
+
+		## The receiver owns buffer `index` until it calls release_preview
+		self.frame.emit(q_img, index)
 
 	@Slot()
 	def run(self):
 		self.is_running = True
 		self.status.emit("Starting camera...")
+
+		decode_thread = None
+		self.profile = {"frames": 0, "frame_copies": 0, "frames_dropped": 0, "previews": 0, "previews_dropped": 0, "preview_scale_time": 0.0, "first_read": None}
+		self.read_codes = {}
+		self._started_at = time.perf_counter()
 		
 		try:
 
-			self.camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+			self.camera = FrameSource.open(self.source)
 			
 			if not self.camera.isOpened():
 				self.error.emit("Camera could not be opened")
@@ -74,56 +637,86 @@ class CameraWorker(QThread):
 			self.is_camera_active = True
 			self.status.emit("Camera started successfully")
 			
-			fps = int(self.camera.get(5))
+			fps = int(self.camera.get(cv2.CAP_PROP_FPS))
 			print(f"Frame Rate : {fps} frames per second")
 
+			## Pace the preview by the camera's own frame rate instead of a fixed sleep
+			frame_interval = 1.0 / fps if fps > 0 else 1.0 / 30
+			next_frame_at = time.perf_counter()
+			interpolation = cv2.INTER_NEAREST if fps >= self.FAST_SCALING_FPS else cv2.INTER_LINEAR
+
+			## The first frame tells the ring how big its buffers must be
+			ret, frame = self.camera.read()
+			if not ret:
+				self.error.emit("Failed to read frame")
+				return
+			self._frame_ring.allocate(frame.shape)
+
+			## Decoding runs on its own thread and always picks the newest frame, so it never stalls the preview
+			self._frame_slot = LatestFrameSlot(on_drop=lambda item: self._frame_ring.release(item[0]))
+			self.decoder = BarcodeDecoder()
+			self.confirmer = ScanConfirmer(self.confirm_frames, self.cooldown)
+			decode_thread = threading.Thread(target=self._decode_loop, name="BarcodeDecoder", daemon=True)
+			decode_thread.start()
+
 			while self.camera.isOpened():
 
 				if self.is_running == False:
 					return
 
-				ret, frame = self.camera.read()
+				index = self._frame_ring.acquire()
+
+				if index is None:
+					## Every buffer is still owned downstream, skip this frame without decoding it
+					self.camera.grab()
+					self.profile["frames_dropped"] += 1
+					continue
+
+				buffer = self._frame_ring.buffers[index]
+				ret, frame = self.camera.read(buffer)
 
 				if not ret:
-					self.error.emit("Failed to read frame")
+					self._frame_ring.release(index)
+					if self.camera.is_live:
+						self.error.emit("Failed to read frame")
+					else:
+						self.status.emit("Frame source finished")
 					break
-				
-				isbn_barcode = None
-				
-				decoded_barcodes = decode(frame)
-				for decoded_barcode in decoded_barcodes:
-					if decoded_barcode:
-						if decoded_barcode.type == "EAN13":
-							isbn_barcode = decoded_barcode
-
-				if isbn_barcode:
-					isbn_code = isbn_barcode.data.decode("utf-8")
-					self.isbn.emit(isbn_code)
 
-					(x, y, w, h) = isbn_barcode.rect
-					pt1_rect = (x, y)
-					pt2_rect = (x + w, y + h)
-
-					cv2.rectangle(
-						img=frame,
-						pt1=pt1_rect,
-						pt2=pt2_rect,
-						thickness=2,
-						color=(0, 0, 255),
-						lineType=cv2.LINE_8
-					)
-
-				h, w, ch = frame.shape
-				bytes_per_line = ch * w
-				q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format.Format_BGR888)
-				self.frame.emit(q_img)
-
-				CameraWorker.msleep(30)
+				if frame is not buffer:
+					## The backend ignored the buffer and allocated its own array
+					buffer[...] = frame
+					frame = buffer
+					self.profile["frame_copies"] += 1
+
+				self.profile["frames"] += 1
+
+				self._frame_ring.retain(index)
+				self._frame_slot.put((index, frame))
+
+				self._emit_preview(frame, interpolation)
+				self._frame_ring.release(index)
+
+				if not self.paced:
+					continue
+
+				next_frame_at += frame_interval
+				delay = next_frame_at - time.perf_counter()
+				if delay > 0:
+					time.sleep(delay)
+				else:
+					next_frame_at = time.perf_counter()
 				
 		except Exception as e:
 			self.error.emit(f"Camera error: {str(e)}")
 		finally:
 			self.stop_camera()
+			if self._frame_slot:
+				self._frame_slot.close()
+			if decode_thread:
+				decode_thread.join()
+				print(f"Decoder skipped {self._frame_slot.dropped} of {self._frame_slot.produced} frames, {self.decoder.stats()}")
+				print(f"Camera profile: {self.profile}, buffer allocations {self._frame_ring.allocations + self._preview_ring.allocations}")
 			self.status.emit("Camera stopped")
 			self.finished.emit()
 	
@@ -142,24 +735,32 @@ class CameraWorker(QThread):
 		return self.is_running and self.is_camera_active
 
 
+
 class ScraperWorkerSignals(QObject):
 	finished = Signal()
 	error = Signal(str)
 	result = Signal(dict)
 
+	def deliver(self, future: Future):
+		if future.cancelled():
+			self.error.emit("Lookup was cancelled")
+			return
+
+		err = future.exception()
+		if err:
+			self.error.emit(str(err) or type(err).__name__)
+			return
+
+		self.finished.emit()
+		self.result.emit(future.result())
+
 class ScraperWorker(QRunnable):
-	def __init__(self, _isbn:str="1692492780"):
+	def __init__(self, _isbn:str="1692492780", cache:ScraperCache=None, offline:bool=False, base_url:str="https://www.amazon.com/dp/", provider_chain:ProviderChain=None):
 		super().__init__()
 		
 		self._isbn = _isbn
-		self.headers = {
-			'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-			'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
-			'Accept-Language': 'en-US,en;q=0.9,tr;q=0.8',
-			'Connection': 'keep-alive',
-			'Upgrade-Insecure-Requests': '1',
-			# 'Referer': 'https://www.google.com/'
-		}
+		self.scraper = BookScraper(cache=cache, offline=offline, base_url=base_url, provider_chain=provider_chain)
+		self.future = Future()
 
 		self.signals = (
 			ScraperWorkerSignals()
@@ -168,102 +769,252 @@ class ScraperWorker(QRunnable):
 	@Slot()
 	def run(self):
 
-		_isbn10 = ""
+		try:
+			scraped_book = self.scraper.scrape(self._isbn)
 
-		self._isbn = isbnlib.canonical(self._isbn)
-		
-		if isbnlib.is_isbn13(self._isbn):
-			_isbn10 = isbnlib.to_isbn10(self._isbn)
+		except ValueError as err:
+			print(f"[ERROR] - {err}")
+			self.future.set_exception(err)
+			self.signals.error.emit(str(err))
 
-		elif isbnlib.is_isbn10(self._isbn):
-			_isbn10 = self._isbn
+		except Exception as err:
+			self.future.set_exception(err)
+			self.signals.error.emit(str(err))
 
 		else:
-			print("[ERROR] - You should enter a valid ISBN.")
-			return
-		
+			self.future.set_result(scraped_book)
+			self.signals.finished.emit()
+			self.signals.result.emit(scraped_book)
+
+
+
+class BatchEnrichmentSignals(QObject):
+	progress = Signal(int, int)
+	result = Signal(dict)
+	error = Signal(str, str)
+	committed = Signal(int)
+	finished = Signal(int)
+
+class BatchEnrichmentJob(QRunnable):
+	def __init__(self, isbns, db, **kwargs):
+		super().__init__()
+
+		self.signals = (
+			BatchEnrichmentSignals()
+		)
+		self.enricher = BatchEnricher(isbns, db, signals=self.signals, **kwargs)
+
+	@Slot()
+	def run(self):
+		self.enricher.run()
+
+	def stop(self):
+		self.enricher.stop()
+
+class SearchIndexSignals(QObject):
+	ready = Signal(object)
+	patched = Signal(object)
+
+class MaintenanceSignals(QObject):
+	finished = Signal(dict)
+	error = Signal(str)
+
+class MaintenanceJob(QRunnable):
+	def __init__(self, cleaner: CollectionCleaner, apply: bool = False):
+		super().__init__()
+		self.cleaner = cleaner
+		self.apply = apply
+		self.signals = MaintenanceSignals()
+
+	@Slot()
+	def run(self):
 		try:
-			book_amazon_url = f"https://www.amazon.com/dp/{_isbn10}"
+			report = self.cleaner.apply() if self.apply else self.cleaner.plan()
+		except Exception as e:
+			self.signals.error.emit(str(e))
+		else:
+			self.signals.finished.emit(report)
+
+class BulkScanSession:
+	def __init__(self, existing_keys: set = None):
+		self.started_at = time.monotonic()
+		self.seen = set(existing_keys or ())
+		self.pending = set()
+		self.scanned = 0
+		self.resolved = 0
+		self.failed = 0
+		self.skipped = 0
+		self.saved = 0
+
+	def add(self, _isbn: str) -> bool:
+		self.scanned += 1
+		key = ScraperCache.key(_isbn)
+
+		## Books already in the collection or already in the review list are not fetched again
+		if not key or key in self.seen:
+			self.skipped += 1
+			return False
+
+		self.seen.add(key)
+		self.pending.add(key)
+		return True
+
+	def complete(self, _isbn: str, ok: bool):
+		key = ScraperCache.key(_isbn)
+		self.pending.discard(key)
+		if ok:
+			self.resolved += 1
+		else:
+			## A failed lookup can be a timeout or a rate limit, scanning the book again retries it
+			self.seen.discard(key)
+			self.failed += 1
+
+	def books_per_minute(self) -> float:
+		minutes = (time.monotonic() - self.started_at) / 60
+		return self.resolved / minutes if minutes > 0 else 0.0
+
+	def summary(self) -> str:
+		return (
+			f"{self.books_per_minute():.1f} books/min | {self.scanned} scanned, {len(self.pending)} pending, "
+			f"{self.resolved} found, {self.failed} failed, {self.skipped} skipped, {self.saved} saved"
+		)
 
-			page = requests.get(url=book_amazon_url, headers=self.headers)
 
-			soup = BeautifulSoup(page.text, "html.parser")
+class CoverLoadSignals(QObject):
+	loaded = Signal(str, QImage)
 
-			title = ""
-			author = ""
-			publisher = ""
-			publication_date = ""
-			isbn10 = ""
-			isbn13 = ""
-			page_count = ""
-			language = ""
-			description = ""
 
-			if soup.find(id="productTitle"):
-				title = soup.find(id="productTitle").text.strip()
+class CoverLoadJob(QRunnable):
+	def __init__(self, _isbn: str, covers: "CoverCache"):
+		super().__init__()
+		self._isbn = _isbn
+		self.covers = covers
 
-			# +++++++++ Translator
-			if soup.find(class_="author").a:
-				author = soup.find(class_="author").a.text # Author
+	def run(self):
+		self.covers.load(self._isbn)
 
 
-			for i in soup.find(id="detailBullets_feature_div").find("ul").find_all(class_="a-list-item"):
-				
-				if ("Publisher" in i.find_all("span")[0].text):
-					publisher = i.find_all("span")[1].text
-				
-				elif ("Publication date" in i.find_all("span")[0].text):
-					publication_date = i.find_all("span")[1].text
+class CoverCache(QObject):
 
-				elif ("ISBN-10" in i.find_all("span")[0].text):
-					isbn10 = i.find_all("span")[1].text
-				
-				elif ("ISBN-13" in i.find_all("span")[0].text):
-					isbn13 = i.find_all("span")[1].text
-				
-				elif ("Print length" in i.find_all("span")[0].text):
-					page_count = i.find_all("span")[1].text
-				
-				elif ("Language" in i.find_all("span")[0].text):
-					language = i.find_all("span")[1].text
+	## Emitted on the GUI thread once a cover, or the lack of one, is in memory
+	loaded = Signal(str)
 
-			isDescription = True if soup.find(id="bookDescription_feature_div") else False
-			description = soup.find(id="bookDescription_feature_div").text.strip().replace(" Read more", "") if isDescription else "" # Description
-			
-			# price = soup.find(class_="slot-price").text.strip().replace("from ", "") # Price
+	def __init__(self, store: CoverStore, size: QSize = QSize(32, 48), memory_entries: int = 2048, offline: bool = False, max_threads: int = 2):
+		super().__init__()
+		self.store = store
+		self.size = size
+		self.memory_entries = memory_entries
+		self.offline = offline
+
+		## Scaled pixmaps by ISBN, most recently used last, a null pixmap marks a book without a cover
+		self.pixmaps = OrderedDict()
+		self.wanted = set()
+		self.pending = set()
+		self.lock = threading.Lock()
+
+		## Its own pool, so a screen full of covers never queues ahead of a lookup
+		self.threadpool = QThreadPool()
+		self.threadpool.setMaxThreadCount(max_threads)
+		self.signals = CoverLoadSignals()
+		self.signals.loaded.connect(self._remember)
+
+	def pixmap(self, _isbn: str) -> QPixmap | None:
+		pixmap = self.pixmaps.get(_isbn)
+		if pixmap is not None:
+			self.pixmaps.move_to_end(_isbn)
+		return pixmap
+
+	def request(self, visible: list, prefetch: list = ()):
+		with self.lock:
+			## Rows that scrolled away before their job ran are skipped by it
+			self.wanted = set(visible) | set(prefetch)
+			missing = [(_isbn, priority) for priority, isbns in ((1, visible), (0, prefetch)) for _isbn in isbns if _isbn not in self.pixmaps and _isbn not in self.pending]
+			self.pending.update(_isbn for _isbn, _ in missing)
+
+		for _isbn, priority in missing:
+			self.threadpool.start(CoverLoadJob(_isbn, self), priority)
+
+	def load(self, _isbn: str):
+		## Runs on the pool, QImage is safe off the GUI thread while QPixmap is not
+		with self.lock:
+			if _isbn not in self.wanted:
+				self.pending.discard(_isbn)
+				return
 
-			# print(title, author, isbn10, isbn13, language, description, price)
+		## Refused covers stay out of memory, so they are fetched again once the refusal expires
+		if self.store.is_refused(_isbn):
+			with self.lock:
+				self.pending.discard(_isbn)
+			return
 
-		except Exception as err:
-			self.signals.error.emit(err)
+		image = QImage()
+		try:
+			thumbnail = self.store.get(_isbn)
+			if thumbnail is not None:
+				with metrics.span("covers.decode", profile=False):
+					image.loadFromData(thumbnail)
+
+			elif not self.offline and not self.store.is_missing(_isbn):
+				cover = self.store.fetch(_isbn)
+				with metrics.span("covers.decode", profile=False):
+					if cover and image.loadFromData(cover):
+						image = image.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+						buffer = QBuffer()
+						buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+						image.save(buffer, "JPG", 85)
+						self.store.put(_isbn, bytes(buffer.data()))
+
+		except Exception as e:
+			## Failed fetches are not kept in memory, the row tries again when it next scrolls into view
+			print(f"[ERROR] - Cover for {_isbn} could not be loaded: {e}")
+			with self.lock:
+				self.pending.discard(_isbn)
+			return
+
+		self.signals.loaded.emit(_isbn, image)
+
+	def _remember(self, _isbn: str, image: QImage):
+		with self.lock:
+			self.pending.discard(_isbn)
+
+		self.pixmaps[_isbn] = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+		self.pixmaps.move_to_end(_isbn)
+		while len(self.pixmaps) > self.memory_entries:
+			self.pixmaps.popitem(last=False)
+
+		self.loaded.emit(_isbn)
 
-		else:
-			self.signals.finished.emit()
-			self.signals.result.emit({
-				"title": title,
-				"author": author,
-				"publisher": publisher,
-				"publication_date": publication_date,
-				"isbn10": isbn10,
-				"isbn13": isbn13,
-				"page_count": page_count,
-				"language": language,
-				"description": description,
-			})
 
 class BookModel(QAbstractTableModel):
-	def __init__(self, books=None):
+
+	## Rows keep their title, author, publisher, ISBN-13, _id values, the cover column sits in front of them
+	COVER_COLUMN = 0
+	ISBN_VALUE = 3
+
+	def __init__(self, books=None, covers: CoverCache = None):
 		super().__init__()
 		self.books = books or []
-		self.headers = ["Title", "Author", "Publisher", "ISBN-13"]
+		self.covers = covers
+		self.headers = ["Cover", "Title", "Author", "Publisher", "ISBN-13"]
 
 	def data(self, index, role):
 
 		if not index.isValid():
 			return None
 
+		if index.column() == self.COVER_COLUMN:
+			## Only what is already in memory, loading is driven by the visible rows
+			if role == Qt.ItemDataRole.DecorationRole and self.covers:
+				pixmap = self.covers.pixmap(self.books[index.row()][self.ISBN_VALUE])
+				return pixmap if pixmap is not None and not pixmap.isNull() else None
+			return None
+
 		if role == Qt.ItemDataRole.DisplayRole:
-			return self.books[index.row()][index.column()]
+			return self.books[index.row()][index.column() - 1]
+
+	def cover_isbns(self, first: int, last: int) -> list:
+		return [self.books[row][self.ISBN_VALUE] for row in range(max(first, 0), min(last, len(self.books) - 1) + 1)]
 
 	def rowCount(self, index):
 		return len(self.books)
@@ -282,54 +1033,183 @@ class BookModel(QAbstractTableModel):
 			elif orientation == Qt.Orientation.Vertical:
 				return str(section+1)
 
+	def set_row(self, row: int, values: list):
+		self.books[row] = values
+		self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+
+	def append_row(self, values: list):
+		self.beginInsertRows(QModelIndex(), len(self.books), len(self.books))
+		self.books.append(values)
+		self.endInsertRows()
+
+	def remove_row(self, row: int):
+		self.beginRemoveRows(QModelIndex(), row, row)
+		del self.books[row]
+		self.endRemoveRows()
+
 class MainWindow(QMainWindow):
 	
 	def __init__(self):
 		super().__init__()
 
 		self.db = BasicDB(collection_name="books", root_dir=os.path.abspath(__file__))
-		self.books = self.db.find()
+		self.scraper_cache = ScraperCache(root_dir=os.path.abspath(__file__))
+		self.lookup_registry = InFlightRegistry()
+
+		## Metadata sources come from HOLOCRON_PROVIDERS, HOLOCRON_HEDGE_DELAY and HOLOCRON_DUMPS
+		self.provider_chain = ProviderChain.from_env()
+		for provider in self.provider_chain.providers:
+			if provider.is_local:
+				threading.Thread(target=provider.ensure_index, name="LocalDumpIndex", daemon=True).start()
+		self.offline = os.environ.get("HOLOCRON_OFFLINE") == "1"
+
+		## HOLOCRON_SCRAPER_ENGINE=async multiplexes lookups on one event loop thread
+		self.async_scraper_engine = None
+		## Local dumps are not fetched over HTTP, the engine talks to the first network source and lookups stay on the workers without one
+		if os.environ.get("HOLOCRON_SCRAPER_ENGINE") == "async":
+			if self.provider_chain.network_providers:
+				self.async_scraper_engine = AsyncScraperEngine(cache=self.scraper_cache, offline=self.offline, provider=self.provider_chain.network_providers[0])
+				self.async_scraper_engine.start()
+			else:
+				print("[ERROR] - HOLOCRON_SCRAPER_ENGINE=async needs a network provider in HOLOCRON_PROVIDERS, using the worker threads")
+		## Read together so the search index snapshot can be matched against exactly these books
+		with self.db.lock:
+			self.collection_version = self.db.version()
+			self.books = self.db.find()
 		self.books_list = self.extract_values_from_docs(self.books)
 		self.scraped_book = None
 
+		## books.json.searchidx is mapped as it is when it still matches the collection, otherwise rebuilt in the background
+		self.search_index = SearchIndex(self.db.file_path)
+		self.search_index.remove_stale_builds()
+		self.search_index_signals = SearchIndexSignals()
+		self.search_index_signals.ready.connect(self.install_search_index)
+		self.search_index_signals.patched.connect(self.patch_search_index)
+		self.search_index_building = False
+		self.search_index_dirty = False
+		self.search_index_patching = False
+		with metrics.span("search_index.load"):
+			self.search_index.load(self.collection_version, self.books)
+		self.refresh_search_index()
+
 		self.setup_ui()
 		self.label_camera = QLabel()
 
-		self.model = BookModel(self.books_list)
+		## Covers come from memory, then data/covers, then the network, on their own worker pool
+		self.covers = CoverCache(
+			CoverStore(root_dir=os.path.abspath(__file__), url=os.environ.get("HOLOCRON_COVER_URL"), rate_limiter=RateLimiter(requests_per_second=float(os.environ.get("HOLOCRON_COVER_RPS", "1")))),
+			size=QSize(32, 48),
+			offline=self.offline,
+		)
+		self.covers.loaded.connect(self.repaint_covers)
+		metrics.watch("covers.in_memory", lambda: len(self.covers.pixmaps))
+		metrics.watch("covers.pending", lambda: len(self.covers.pending))
+
+		self.model = BookModel(self.books_list, covers=self.covers)
 		self.table_view.setModel(self.model)
+		self.table_view.horizontalHeader().setSectionResizeMode(BookModel.COVER_COLUMN, QHeaderView.ResizeMode.Fixed)
+		self.table_view.horizontalHeader().resizeSection(BookModel.COVER_COLUMN, 44)
+
+		self.cover_scroll_value = 0
+		self.table_view.verticalScrollBar().valueChanged.connect(self.schedule_visible_covers)
+		self.model.layoutChanged.connect(self.load_visible_covers)
+		self.model.rowsInserted.connect(self.load_visible_covers)
+		self.model.rowsRemoved.connect(self.load_visible_covers)
+		self.model.dataChanged.connect(self.schedule_visible_covers)
+		self.cover_load_timer = QTimer(self)
+		self.cover_load_timer.setSingleShot(True)
+		self.cover_load_timer.timeout.connect(self.load_visible_covers)
+		QTimer.singleShot(0, self.load_visible_covers)
 
 		# Camera worker initialization
-		self.camera_worker = CameraWorker()
+		## HOLOCRON_FRAME_SOURCE replays a video file, an image directory or synthetic barcodes instead of the webcam
+		self.camera_worker = CameraWorker(source=os.environ.get("HOLOCRON_FRAME_SOURCE"))
 		self.camera_worker.status.connect(self.handle_camera_status)
 		self.camera_worker.error.connect(self.handle_camera_error)
+		## Connected once, every extra connection would release preview buffers twice
+		self.camera_worker.frame.connect(self.update_frame)
+		self.camera_worker.isbn.connect(self.handle_scanned_isbn)
+		self.bulk_scan_handler = None
+		self.camera_worker.finished.connect(self.report_preview_profile)
+		self.preview_profile = {"frames": 0, "gui_time": 0.0}
 
 		## QThreadPool
 		self.threadpool = QThreadPool()
 		print(f"Multithreading with maximum {self.threadpool.maxThreadCount()} threads")
 
+		metrics.watch("threadpool.active_threads", self.threadpool.activeThreadCount)
+		metrics.watch("threadpool.max_threads", self.threadpool.maxThreadCount)
+		metrics.watch("lookups.in_flight", lambda: self.lookup_registry.stats()["in_flight"])
+		self.metrics_panel = None
+		QShortcut(QKeySequence("Ctrl+M"), self, activated=self.show_metrics_panel)
+
 
 		# ////////////////////////
 		# Signals
 		self.button_add.clicked.connect(self.add_book)
 		self.button_edit.clicked.connect(self.edit_book)
 		self.button_delete.clicked.connect(self.delete_book)
+		self.button_batch_enrich.clicked.connect(self.batch_enrich)
+		self.button_bulk_scan.clicked.connect(self.show_bulk_scan_dialog)
+		self.button_clean_up.clicked.connect(self.clean_up_collection)
 
 		self.table_view.pressed.connect(lambda: self.button_edit.setDisabled(False))
 		self.table_view.pressed.connect(lambda: self.button_delete.setDisabled(False))
 
 		self.table_view.doubleClicked.connect(self.show_book_details_dialog)
 
-		self.lineedit_search.textChanged.connect(self.search_book)
+		## Searches the index cannot answer scan the whole collection, they wait for a pause in typing
+		self.search_timer = QTimer(self)
+		self.search_timer.setSingleShot(True)
+		self.search_timer.setInterval(300)
+		self.search_timer.timeout.connect(lambda: self.search_book(self.lineedit_search.text()))
+		self.lineedit_search.textChanged.connect(self.handle_search_text_changed)
+
+		## Other instances and scripts write the same collection, their changes are patched in
+		self.collection_watcher = QFileSystemWatcher([self.db.file_path, self.db.base_dir], self)
+		self.collection_watcher.fileChanged.connect(self.schedule_collection_reload)
+		self.collection_watcher.directoryChanged.connect(self.schedule_collection_reload)
+		self.collection_reload_timer = QTimer(self)
+		self.collection_reload_timer.setSingleShot(True)
+		self.collection_reload_timer.setInterval(250)
+		self.collection_reload_timer.timeout.connect(self.reload_changed_documents)
 
 		QApplication.instance().aboutToQuit.connect(self.camera_worker.stop_camera)
+		if self.async_scraper_engine:
+			QApplication.instance().aboutToQuit.connect(self.async_scraper_engine.stop)
+
+		## HOLOCRON_METRICS_EXPORT writes the timings to a JSON file when the app quits
+		metrics_export_path = os.environ.get("HOLOCRON_METRICS_EXPORT")
+		if metrics_export_path:
+			QApplication.instance().aboutToQuit.connect(lambda: metrics.export(metrics_export_path))
 
 
-	def update_frame(self, q_img):
+	def update_frame(self, q_img, buffer_index=-1):
+		started = time.perf_counter()
+
+		## Already scaled by the camera worker, fromImage copies so the buffer can go straight back
 		if self.label_camera:
-			self.label_camera.setPixmap(QPixmap.fromImage(q_img).scaled(
-				self.label_camera.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-			))
+			self.label_camera.setPixmap(QPixmap.fromImage(q_img))
+		self.camera_worker.release_preview(buffer_index)
+
+		self.preview_profile["frames"] += 1
+		self.preview_profile["gui_time"] += time.perf_counter() - started
+
+	def report_preview_profile(self):
+		frames = self.preview_profile["frames"]
+		if frames:
+			print(f"Preview: {frames} frames, {self.preview_profile['gui_time'] / frames * 1000:.3f} ms GUI time per frame")
+		self.preview_profile = {"frames": 0, "gui_time": 0.0}
 	
+	def handle_scanned_isbn(self, isbn):
+		## While bulk scanning every confirmed ISBN goes straight to a lookup
+		if self.bulk_scan_handler:
+			self.bulk_scan_handler(isbn)
+			return
+
+		if getattr(self, "lineedit_scraping_input", None):
+			self.lineedit_scraping_input.setText(isbn)
+
 	def handle_camera_error(self, error_msg):
 		print(f"Camera error: {error_msg}")
 		# You can show a message box or update UI here
@@ -340,7 +1220,11 @@ class MainWindow(QMainWindow):
 		
 	def handle_search_text_changed(self, search_text):
 
-		QTimer.singleShot(300, lambda: self.search_book(search_text=search_text))
+		if not search_text or self.search_index.can_answer(self.db.version()):
+			self.search_timer.stop()
+			self.search_book(search_text)
+		else:
+			self.search_timer.start()
 
 	def search_book(self, search_text):
 
@@ -348,21 +1232,17 @@ class MainWindow(QMainWindow):
 			self._update_model()
 			return
 
-		books = self.db.find()
-
-		search_text = search_text.lower()
-
 		def linear_search(search_text):
-			found_books = []
-			for book in books:
-				for key, value in book.items():
+			isbn = isbn_forms(search_text)
+			return [book for book in self.db.find() if matches(book, search_text, isbn)]
 
-					if search_text and search_text in value.lower() and key != "_id":
-						found_books.append(book)
-						break
-			return found_books
+		with metrics.span("search"):
+			## The index answers while it or its patch matches the collection, the file is scanned until there is one
+			found_books = self.search_index.search(search_text, self.db.version())
+			if found_books is None:
+				found_books = linear_search(search_text.lower())
 
-		self._update_model(linear_search(search_text))
+		self._update_model(found_books)
 
 	
 		
@@ -413,15 +1293,55 @@ class MainWindow(QMainWindow):
 
 	# ////////////////////////////////////////////////////////////
 	# SCRAPER WORKER ////////////////////////////////////////////
-	def start_scraper_worker(self, _isbn:str, callback=None):
-		## Defining ScraperWorker for scraping
-		scraper_worker = ScraperWorker(_isbn)
+	def start_scraper_worker(self, _isbn:str, callback=None, error_callback=None):
+		signals = ScraperWorkerSignals()
 		if callback:
-			scraper_worker.signals.result.connect(callback)
-		scraper_worker.signals.result.connect(self.scaper_worker_output)
-		scraper_worker.signals.error.connect(self.scraper_worker_error)
-		scraper_worker.signals.finished.connect(self.scaper_worker_complete)
-		self.threadpool.start(scraper_worker)
+			signals.result.connect(callback)
+		if error_callback:
+			signals.error.connect(error_callback)
+		signals.result.connect(self.scaper_worker_output)
+		signals.error.connect(self.scraper_worker_error)
+		signals.finished.connect(self.scaper_worker_complete)
+
+		## Local dumps are a binary search away, complete records are answered right here
+		_isbn13 = canonical_isbn13(_isbn)
+		local_book = self.provider_chain.lookup_local(_isbn13) if _isbn13 else None
+		if local_book and (self.offline or ProviderChain.is_complete(local_book)):
+			signals.finished.emit()
+			signals.result.emit(local_book)
+			return
+
+		## Requests for an ISBN that is already being fetched share the pending result
+		self._submit_lookup(_isbn, signals, local_book=local_book)
+
+	def _submit_lookup(self, _isbn:str, signals:ScraperWorkerSignals, retry:bool=True, local_book:dict=None):
+		def deliver(future: Future):
+			## A joined lookup cancelled under us is started again instead of failing
+			if future.cancelled() and retry:
+				print(f"[INFO] - Lookup for {_isbn} was cancelled, submitting it again")
+				self._submit_lookup(_isbn, signals, retry=False, local_book=local_book)
+				return
+
+			## Partial dump records (no authors) are still better than an error
+			if local_book and (future.cancelled() or future.exception()):
+				print(f"[INFO] - Network lookup for {_isbn} failed, using the partial local record")
+				signals.finished.emit()
+				signals.result.emit(local_book)
+				return
+
+			signals.deliver(future)
+
+		future = self.lookup_registry.submit(_isbn, self._start_lookup)
+		future.add_done_callback(deliver)
+
+	def _start_lookup(self, _isbn:str) -> Future:
+		if self.async_scraper_engine:
+			return self.async_scraper_engine.submit(_isbn)
+
+		## Defining ScraperWorker for scraping
+		scraper_worker = ScraperWorker(_isbn, cache=self.scraper_cache, offline=self.offline, provider_chain=self.provider_chain)
+		metrics.start(self.threadpool, scraper_worker)
+		return scraper_worker.future
 
 	def scaper_worker_output(self, s):
 		print("RESULT", s)
@@ -434,6 +1354,317 @@ class MainWindow(QMainWindow):
 	# ////////////////////////////////////////////////////////////
 
 
+	# ////////////////////////////////////////////////////////////
+	# BATCH ENRICHMENT //////////////////////////////////////////
+	def batch_enrich(self):
+
+		if getattr(self, "batch_enrichment_job", None):
+			self.batch_enrichment_job.stop()
+			return
+
+		path, _ = QFileDialog.getOpenFileName(self, "Holocron - Batch Enrich", "", "ISBN lists (*.txt *.csv);;All files (*)")
+
+		if path:
+			self.start_batch_enrichment_job(path)
+
+	def start_batch_enrichment_job(self, isbns):
+		self.batch_enrichment_job = BatchEnrichmentJob(isbns, self.db, cache=self.scraper_cache, offline=self.offline, provider_chain=self.provider_chain)
+		self.batch_enrichment_job.signals.progress.connect(self.batch_enrichment_progress)
+		self.batch_enrichment_job.signals.error.connect(self.batch_enrichment_error)
+		self.batch_enrichment_job.signals.committed.connect(lambda count: self._update_model())
+		self.batch_enrichment_job.signals.finished.connect(self.batch_enrichment_complete)
+		self.button_batch_enrich.setText("Stop Enrichment")
+		metrics.start(self.threadpool, self.batch_enrichment_job)
+
+	def batch_enrichment_progress(self, done, total):
+		self.statusBar().showMessage(f"Enriching books: {done}/{total}")
+
+	def batch_enrichment_error(self, _isbn, error):
+		print(f"[ERROR] - {_isbn}: {error}")
+
+	def batch_enrichment_complete(self, inserted):
+		self.batch_enrichment_job = None
+		self.button_batch_enrich.setText("Batch Enrich")
+		self.statusBar().showMessage(f"Batch enrichment finished, {inserted} books added", 5000)
+		self._update_model()
+	# ////////////////////////////////////////////////////////////
+
+
+	# ////////////////////////////////////////////////////////////
+	# MAINTENANCE ///////////////////////////////////////////////
+	def clean_up_collection(self):
+		## A dry run first, nothing is written until the report is accepted
+		self.collection_cleaner = CollectionCleaner(self.db)
+		self.start_maintenance_job(apply=False)
+
+	def start_maintenance_job(self, apply: bool):
+		job = MaintenanceJob(self.collection_cleaner, apply=apply)
+		job.signals.finished.connect(self.maintenance_applied if apply else self.show_cleanup_report)
+		job.signals.error.connect(self.maintenance_error)
+
+		self.button_clean_up.setDisabled(True)
+		self.statusBar().showMessage("Cleaning up the library..." if apply else "Checking the library for duplicates and scraped boilerplate...")
+		metrics.start(self.threadpool, job)
+
+	def show_cleanup_report(self, report):
+		self.button_clean_up.setDisabled(False)
+		self.statusBar().clearMessage()
+
+		dialog = QDialog(self)
+		dialog.setWindowTitle("Holocron - Clean Up")
+		dialog.resize(720, 420)
+		dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+		layout = QVBoxLayout()
+
+		text_report = QTextEdit()
+		text_report.setReadOnly(True)
+		text_report.setFont(QFont("Monospace"))
+		text_report.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+		text_report.setPlainText(self.collection_cleaner.summary())
+		layout.addWidget(text_report)
+
+		layout_buttons = QHBoxLayout()
+		button_apply = QPushButton("Apply")
+		button_apply.setStyleSheet("padding: 5px 10px;")
+		button_apply.setDisabled(not (report["cleaned"] or report["removed"]))
+		layout_buttons.addWidget(button_apply)
+
+		button_close = QPushButton("Close")
+		button_close.setStyleSheet("padding: 5px 10px;")
+		layout_buttons.addWidget(button_close)
+		layout.addLayout(layout_buttons)
+
+		dialog.setLayout(layout)
+
+		def apply():
+			dialog.close()
+			self.start_maintenance_job(apply=True)
+
+		button_apply.clicked.connect(apply)
+		button_close.clicked.connect(dialog.close)
+		dialog.show()
+
+	def maintenance_applied(self, report):
+		self.button_clean_up.setDisabled(False)
+		self.statusBar().showMessage(f"Cleaned {report['cleaned']} books and removed {report['removed']} duplicates", 5000)
+		self._update_model()
+
+	def maintenance_error(self, error):
+		self.button_clean_up.setDisabled(False)
+		self.statusBar().clearMessage()
+		print(f"[ERROR] - Clean up failed: {error}")
+		QMessageBox.warning(self, "Holocron - Clean Up", f"Clean up failed: {error}")
+	# ////////////////////////////////////////////////////////////
+
+
+	# ////////////////////////////////////////////////////////////
+	# METRICS ///////////////////////////////////////////////////
+	def show_metrics_panel(self):
+
+		if self.metrics_panel:
+			self.metrics_panel.raise_()
+			return
+
+		dialog = QDialog(self)
+		dialog.setWindowTitle("Holocron - Metrics")
+		dialog.resize(720, 420)
+		dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+		layout = QVBoxLayout()
+
+		text_metrics = QTextEdit()
+		text_metrics.setReadOnly(True)
+		text_metrics.setFont(QFont("Monospace"))
+		text_metrics.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+		layout.addWidget(text_metrics)
+
+		layout_buttons = QHBoxLayout()
+		button_export = QPushButton("Export JSON")
+		button_export.setStyleSheet("padding: 5px 10px;")
+		layout_buttons.addWidget(button_export)
+		layout.addLayout(layout_buttons)
+
+		dialog.setLayout(layout)
+
+		def refresh():
+			snapshot = metrics.snapshot()
+			lines = [f"{'span':<32} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+			for name, span in snapshot["spans"].items():
+				lines.append(f"{name:<32} {span['count']:>7} {span['p50']:>9.2f} {span['p95']:>9.2f} {span['p99']:>9.2f} {span['max']:>9.2f}")
+
+			lines += ["", f"{'gauge':<32} {'current':>7} {'p95':>9} {'max':>9}"]
+			for name, gauge in snapshot["gauges"].items():
+				lines.append(f"{name:<32} {gauge.get('current', '-'):>7} {gauge.get('p95', ''):>9} {gauge.get('max', ''):>9}")
+
+			if snapshot["profiles"]:
+				lines += ["", "slow operation profiles:"] + snapshot["profiles"][-10:]
+
+			text_metrics.setPlainText("\n".join(lines))
+
+		def export():
+			path, _ = QFileDialog.getSaveFileName(dialog, "Holocron - Export Metrics", "metrics.json", "JSON (*.json)")
+			if path:
+				metrics.export(path)
+				print(f"[INFO] - Metrics exported to '{path}'")
+
+		timer = QTimer(dialog)
+		timer.timeout.connect(refresh)
+		timer.start(1000)
+		refresh()
+
+		button_export.clicked.connect(export)
+		dialog.destroyed.connect(lambda: setattr(self, "metrics_panel", None))
+
+		self.metrics_panel = dialog
+		dialog.show()
+	# ////////////////////////////////////////////////////////////
+
+
+	# ////////////////////////////////////////////////////////////
+	# BULK SCAN /////////////////////////////////////////////////
+	def show_bulk_scan_dialog(self):
+
+		existing = {document_isbn13(doc) for doc in self.db.find()}
+		existing.discard("")
+
+		session = BulkScanSession(existing)
+		self.bulk_scan_session = session
+
+		dialog = QDialog(self)
+		dialog.setWindowTitle("Holocron - Bulk Scan")
+		dialog.setModal(True)
+		dialog.resize(700, 500)
+
+		layout = QVBoxLayout()
+		layout.setSpacing(15)
+
+		## Camera and live throughput
+		layout_camera = QHBoxLayout()
+		layout_camera.setSpacing(10)
+		self.label_camera.setFixedSize(320, 240)
+		self.camera_worker.set_preview_size(self.label_camera.width(), self.label_camera.height())
+		layout_camera.addWidget(self.label_camera)
+
+		label_stats = QLabel(session.summary())
+		label_stats.setWordWrap(True)
+		layout_camera.addWidget(label_stats)
+		layout.addLayout(layout_camera)
+
+		## Review list, checked books are saved
+		list_review = QListWidget()
+		layout.addWidget(list_review)
+
+		layout_buttons = QHBoxLayout()
+		button_save = QPushButton("Save Accepted")
+		button_save.setStyleSheet("padding: 5px 10px;")
+		layout_buttons.addWidget(button_save)
+
+		button_close = QPushButton("Close")
+		button_close.setStyleSheet("padding: 5px 10px;")
+		layout_buttons.addWidget(button_close)
+		layout.addLayout(layout_buttons)
+
+		dialog.setLayout(layout)
+
+		def refresh_stats():
+			label_stats.setText(session.summary())
+
+		stats_timer = QTimer(dialog)
+		stats_timer.timeout.connect(refresh_stats)
+		stats_timer.start(1000)
+
+		def lookup_finished(_isbn, scraped_book):
+			## Lookups can outlive the dialog
+			if self.bulk_scan_session is not session:
+				return
+
+			if not scraped_book.get("title"):
+				lookup_failed(_isbn, "No title found")
+				return
+
+			session.complete(_isbn, True)
+			item = QListWidgetItem(f"{scraped_book['title']} - {scraped_book['author']} ({_isbn})")
+			item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+			item.setCheckState(Qt.CheckState.Checked)
+			item.setData(Qt.ItemDataRole.UserRole, BookScraper.to_document(scraped_book, _isbn))
+			list_review.addItem(item)
+			refresh_stats()
+
+		def lookup_failed(_isbn, error):
+			if self.bulk_scan_session is not session:
+				return
+
+			session.complete(_isbn, False)
+			item = QListWidgetItem(f"{_isbn} - lookup failed: {error}")
+			item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsUserCheckable)
+			list_review.addItem(item)
+			refresh_stats()
+
+		def scanned(_isbn):
+			if not session.add(_isbn):
+				refresh_stats()
+				return
+
+			print(f"[INFO] - Bulk scan: {_isbn}")
+			self.start_scraper_worker(
+				_isbn,
+				callback=lambda scraped_book, _isbn=_isbn: lookup_finished(_isbn, scraped_book),
+				error_callback=lambda error, _isbn=_isbn: lookup_failed(_isbn, error)
+			)
+			refresh_stats()
+
+		def accepted_items():
+			items = [list_review.item(row) for row in range(list_review.count())]
+			return [item for item in items if item.data(Qt.ItemDataRole.UserRole) and item.checkState() == Qt.CheckState.Checked]
+
+		def save_accepted():
+			items = accepted_items()
+			if not items:
+				return
+
+			## One write for the whole batch
+			self.db.create_many([item.data(Qt.ItemDataRole.UserRole) for item in items])
+			for item in items:
+				list_review.takeItem(list_review.row(item))
+
+			session.saved += len(items)
+			refresh_stats()
+			self._update_model()
+
+		def close_dialog():
+			unsaved = len(accepted_items())
+			if unsaved:
+				reply = QMessageBox.question(
+					dialog,
+					"Holocron - Bulk Scan",
+					f"Discard {unsaved} accepted books that were not saved?",
+					QMessageBox.Yes | QMessageBox.No,
+					QMessageBox.No
+				)
+				if reply != QMessageBox.Yes:
+					return
+			dialog.reject()
+
+		def end_session():
+			stats_timer.stop()
+			self.bulk_scan_handler = None
+			self.bulk_scan_session = None
+			self.camera_worker.stop_camera()
+			print(f"[INFO] - Bulk scan finished: {session.summary()}")
+
+		button_save.clicked.connect(save_accepted)
+		button_close.clicked.connect(close_dialog)
+		dialog.finished.connect(end_session)
+
+		self.bulk_scan_handler = scanned
+		if not self.camera_worker.is_camera_running():
+			self.camera_worker.start_camera()
+
+		dialog.exec()
+	# ////////////////////////////////////////////////////////////
+
+
 	def show_form_dialog(self, existing_book:list=None):
 
 		self.keep_dialog_open_state = False
@@ -442,8 +1673,6 @@ class MainWindow(QMainWindow):
 
 		# Start camera if not already running
 		if not self.camera_worker.is_camera_running() and not existing_book:
-			self.camera_worker.frame.connect(self.update_frame)
-			self.camera_worker.isbn.connect(lambda isbn: self.lineedit_scraping_input.setText(isbn))
 			self.camera_worker.start_camera()
 
 		dialog.finished.connect(self.camera_worker.stop_camera)
@@ -471,6 +1700,7 @@ class MainWindow(QMainWindow):
 		layout_scraping_input.setSpacing(10)
 		layout_scraping_input.setAlignment(Qt.AlignmentFlag.AlignCenter)
 		self.label_camera.setFixedSize(200, 200)
+		self.camera_worker.set_preview_size(self.label_camera.width(), self.label_camera.height())
 		layout_scraping_input.addWidget(self.label_camera)
 
 		self.lineedit_scraping_input = QLineEdit()
@@ -948,15 +2178,168 @@ class MainWindow(QMainWindow):
 
 
 
+	def schedule_collection_reload(self, path):
+		## Atomic replaces drop the file from the watcher, the directory event brings it back
+		if self.db.file_path not in self.collection_watcher.files() and os.path.exists(self.db.file_path):
+			self.collection_watcher.addPath(self.db.file_path)
+		self.collection_reload_timer.start()
+
+	def reload_changed_documents(self):
+
+		version = self.db.version()
+		if version == self.collection_version:
+			return
+
+		## A filtered view is cheap to redo, only the full table is patched in place
+		if self.lineedit_search.text():
+			self.refresh_search_index()
+			self.handle_search_text_changed(self.lineedit_search.text())
+			return
+
+		with metrics.span("model.patch"):
+			## The file changed without the sequence moving, someone wrote it without BasicDB
+			bypassed = version[0] == self.collection_version[0]
+			self.collection_version = version
+			changed, removed = self.db.changes(self.books, compare_contents=bypassed)
+
+			rows = {doc["_id"]: row for row, doc in enumerate(self.books)}
+			for row in sorted((rows[_id] for _id in removed), reverse=True):
+				del self.books[row]
+				self.model.remove_row(row)
+
+			rows = {doc["_id"]: row for row, doc in enumerate(self.books)}
+			for doc in changed:
+				values = self.extract_values_from_docs([doc])[0]
+				if doc["_id"] in rows:
+					self.books[rows[doc["_id"]]] = doc
+					self.model.set_row(rows[doc["_id"]], values)
+				else:
+					self.books.append(doc)
+					self.model.append_row(values)
+
+			self.books_list = self.model.books
+
+		if changed or removed:
+			print(f"[INFO] - Reloaded {len(changed)} changed and {len(removed)} removed books from another writer")
+		self.refresh_search_index()
+
+	def visible_rows(self) -> tuple:
+		viewport = self.table_view.viewport()
+		first = self.table_view.rowAt(0)
+		last = self.table_view.rowAt(viewport.height() - 1)
+
+		if first < 0:
+			return (0, -1)
+		return (first, last if last >= 0 else self.model.rowCount(QModelIndex()) - 1)
+
+	def load_visible_covers(self, *args):
+		first, last = self.visible_rows()
+		if last < first:
+			return
+
+		## Prefetch two screens ahead in the scroll direction and half a screen behind
+		page = last - first + 1
+		scroll_value = self.table_view.verticalScrollBar().value()
+		ahead, behind = (page * 2, page // 2) if scroll_value >= self.cover_scroll_value else (page // 2, page * 2)
+		self.cover_scroll_value = scroll_value
+
+		self.covers.request(
+			self.model.cover_isbns(first, last),
+			self.model.cover_isbns(last + 1, last + ahead) + self.model.cover_isbns(first - behind, first - 1)
+		)
+
+	def schedule_visible_covers(self, *args):
+		## At most one request every 50 ms, a fast scroll would otherwise queue every row it flies past
+		if not self.cover_load_timer.isActive():
+			self.cover_load_timer.start(50)
+
+	def repaint_covers(self, _isbn: str):
+		self.table_view.viewport().update()
+
+	def resizeEvent(self, event):
+		super().resizeEvent(event)
+		## A taller window shows rows that were never scrolled to
+		if hasattr(self, "cover_load_timer"):
+			self.schedule_visible_covers()
+
+	def refresh_search_index(self):
+
+		if self.search_index.version == self.db.version():
+			return
+
+		## One build at a time, changes made meanwhile are picked up by another one when it is done
+		if not self.search_index_building:
+			self.search_index_building = True
+			self.search_index_dirty = False
+			self.start_search_index_job(build=True)
+			return
+
+		## Until then they are patched onto the snapshot, one patch at a time
+		self.search_index_dirty = True
+		if self.search_index.is_ready and not self.search_index_patching and self.search_index.patch_version != self.db.version():
+			self.search_index_patching = True
+			self.start_search_index_job(build=False)
+
+	def start_search_index_job(self, build: bool):
+		base_version, base_documents = self.search_index.version, self.search_index.documents
+
+		def run():
+			with self.db.lock:
+				version = self.db.version()
+				documents = self.db.find()
+
+			if base_version is not None:
+				self.search_index_signals.patched.emit((base_version, version, changes(base_documents, documents), build))
+			if not build:
+				return
+
+			try:
+				tmp_path = self.search_index.build(documents, version)
+			except Exception as e:
+				print(f"[ERROR] - Search index could not be built: {e}")
+				tmp_path = None
+
+			self.search_index_signals.ready.emit((tmp_path, documents, version))
+
+		threading.Thread(target=run, name="SearchIndexBuild" if build else "SearchIndexPatch", daemon=True).start()
+
+	def patch_search_index(self, result):
+		base_version, version, (replaced, removed, added), build = result
+		if not build:
+			self.search_index_patching = False
+
+		self.search_index.patch(base_version, version, replaced, removed, added)
+
+		## A search waiting to scan the collection is answered by the patched index instead
+		if self.search_timer.isActive() and self.search_index.can_answer(self.db.version()):
+			self.search_timer.stop()
+			self.search_book(self.lineedit_search.text())
+
+		## More writes came in while the changes were read
+		self.refresh_search_index()
+
+	def install_search_index(self, result):
+		tmp_path, documents, version = result
+		self.search_index_building = False
+
+		if tmp_path and self.search_index.install(tmp_path, documents, version):
+			if self.search_index_dirty or self.search_index.version != self.db.version():
+				self.refresh_search_index()
+
 	def _update_model(self, books:dict = None):
 
-		self.books = books if books != None else self.db.find()
+		## Our own writes are already on screen, the watcher must not reload them
+		self.collection_version = self.db.version()
+		self.refresh_search_index()
 
-		self.books_list = self.extract_values_from_docs(self.books)
+		with metrics.span("model.refresh"):
+			self.books = books if books != None else self.db.find()
+
+			self.books_list = self.extract_values_from_docs(self.books)
 
-		self.model.books = self.books_list
+			self.model.books = self.books_list
 
-		self.model.layoutChanged.emit()
+			self.model.layoutChanged.emit()
 
 
 
@@ -989,6 +2372,10 @@ class MainWindow(QMainWindow):
 
 		self.table_view = QTableView()
 		self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+		self.table_view.setIconSize(QSize(32, 48))
+		## Fixed row heights keep scrolling through 100k rows from measuring every row
+		self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+		self.table_view.verticalHeader().setDefaultSectionSize(52)
 		self.table_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
 		self.table_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
 		layout_table.addWidget(self.table_view)
@@ -1011,158 +2398,19 @@ class MainWindow(QMainWindow):
 		self.button_delete.setStyleSheet("padding: 5px 0;")
 		layout_buttons_container.addWidget(self.button_delete)
 
+		self.button_batch_enrich = QPushButton("Batch Enrich")
+		self.button_batch_enrich.setStyleSheet("padding: 5px 0;")
+		layout_buttons_container.addWidget(self.button_batch_enrich)
 
+		self.button_bulk_scan = QPushButton("Bulk Scan")
+		self.button_bulk_scan.setStyleSheet("padding: 5px 0;")
+		layout_buttons_container.addWidget(self.button_bulk_scan)
 
+		self.button_clean_up = QPushButton("Clean Up")
+		self.button_clean_up.setStyleSheet("padding: 5px 0;")
+		layout_buttons_container.addWidget(self.button_clean_up)
 
-class BasicDB:
-
-    def __init__(self, collection_name: str, root_dir : str):
-        self.collection_name = collection_name
-
-        self.base_dir = os.path.join(os.path.dirname(root_dir), "data")
-        self.file_path = os.path.join(self.base_dir, f"{self.collection_name}.json")
-
-        self._ensure_data_directory_exists()
-        self._ensure_collection_file_exists()
-        
-
-
-    def _ensure_data_directory_exists(self):
-        if not os.path.exists(self.base_dir):
-            os.makedirs(self.base_dir)
-            print(f"[INFO] - '{self.base_dir}' directory was created.")
-            
-
-    def _read_all_documents(self) -> list:
-        try:
-            with open(self.file_path, mode="r", encoding="utf-8") as file:
-                return json.load(file)
-            
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-        
-    def _write_all_documents(self, documents: list):
-        try:
-            with open(self.file_path, mode="w", encoding="utf-8") as file:
-                json.dump(documents, file, ensure_ascii=False, indent=None)
-        
-        except IOError as err:
-            print(f"[ERROR] - {self.collection_name}.json dosyasına yazma hatası: {err}")
-            raise
-
-
-    def _ensure_collection_file_exists(self):
-        if not os.path.exists(self.file_path):
-            self._write_all_documents([])
-            print(f"[INFO] - '{self.collection_name}.json' file was created.")
-
-
-    # CREATE Opearations
-
-    def create(self, doc: dict) -> dict:
-        
-        if not isinstance(doc, dict):
-            raise ValueError("Documents must be a dictionary.")
-        
-        _id = uuid.uuid4().hex
-        
-        documents = self._read_all_documents()
-
-        new_doc = copy.deepcopy(doc)
-        new_doc["_id"] = _id
-
-        documents.append(new_doc)
-
-        self._write_all_documents(documents)
-        
-        print(f"[INFO] - Belge eklendi: {new_doc.get('title', new_doc.get('name', new_doc['_id']))}")
-        
-        return new_doc
-        
-    
-    # READ Operations
-
-    def find(self, query: dict=None) -> list:
-        
-        documents = self._read_all_documents()
-
-        if not query:
-            return documents
-
-        results = []
-        for doc in documents:
-            query_bools = []
-            for key, value in query.items():
-                if key in doc and doc[key] == value:
-                    query_bools.append(True)
-                else:
-                    query_bools.append(False)
-            if all(query_bools):
-                results.append(doc)
-
-        # results = [
-        #     doc for doc in documents
-        #     if all(key in doc and doc[key] == value for key, value in query.items())
-        # ]
-
-        if results:
-            return results
-
-        return None
-    
-    
-    def find_by_id(self, _id: str) -> dict | None:
-        
-        documents = self._read_all_documents()
-
-        # result = [
-        #     doc for doc in documents if doc and doc["_id"] == _id
-        # ]
-
-        result = None
-
-        for doc in documents:
-            if doc["_id"] == _id:
-                result = doc
-            
-        return result
-
-
-    # UPDATE Operations
-
-    def find_by_id_and_update(self, _id: str, update: dict) -> dict | None:
-
-        documents = self._read_all_documents()
-        
-        doc = self.find_by_id(_id)
-
-        if not doc:
-            return None
-
-        doc_index = documents.index(doc)
-
-        update["_id"] = _id
-
-        documents[doc_index] = update
-
-        self._write_all_documents(documents)
-
-        return update
-
-
-    # DELETE Operations
-
-    def find_by_id_and_delete(self, _id: str):
-        
-        documents = self._read_all_documents()
-        
-        doc = self.find_by_id(_id)
-
-        doc_index = documents.index(doc)
-
-        documents.pop(doc_index)
 
-        self._write_all_documents(documents)
 
 
 
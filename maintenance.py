@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import isbnlib
+
+from core import BOOK_FIELDS, JSON_SEPARATORS, document_isbn13, metrics
+
+## The buy box of a product page, scraped into descriptions by older versions of the scraper
+## Only a whole box is taken out, every label on a line of its own and in page order, up to its closing "Learn more"
+BUY_BOX_GAP = r".{0,600}?"
+BOILERPLATE_PATTERNS = [
+	("Ships from", re.compile(
+		r"^[ \t]*Ships from[ \t]*$" + BUY_BOX_GAP +
+		r"^[ \t]*Sold by[ \t]*$" + BUY_BOX_GAP +
+		r"(?:^[ \t]*Returns[ \t]*$\s*\d+-day refund/replacement" + BUY_BOX_GAP + r"Read full return policy" + BUY_BOX_GAP + r")?" +
+		r"^[ \t]*Payment[ \t]*$\s*Secure transaction" + BUY_BOX_GAP + r"Learn more",
+		re.DOTALL | re.MULTILINE
+	)),
+	("Read more", re.compile(r"\s*Read more\s*\Z")),
+]
+SPACES_PATTERN = re.compile(r"[ \t]{2,}")
+BLANK_LINES_PATTERN = re.compile(r"\s*\n\s*\n\s*")
+
+
+def clean_description(text: str) -> str:
+	## A substring check first, most descriptions have none of it and a regex pass costs far more
+	for marker, pattern in BOILERPLATE_PATTERNS:
+		if marker in text:
+			text = pattern.sub("", text)
+
+	if "  " in text or "\t" in text:
+		text = SPACES_PATTERN.sub(" ", text)
+	if "\n" in text:
+		text = BLANK_LINES_PATTERN.sub("\n\n", text)
+	return text.strip()
+
+
+def clean_document(doc: dict) -> tuple:
+	cleaned = dict(doc)
+	changes = []
+
+	for field in BOOK_FIELDS:
+		if isinstance(cleaned.get(field), str) and field != "description":
+			cleaned[field] = cleaned[field].strip()
+
+	if isinstance(cleaned.get("description"), str):
+		cleaned["description"] = clean_description(cleaned["description"])
+
+	## ISBNs are written the way the scraper stores them, 0136486878 and 978-0136486879
+	key = document_isbn13(cleaned)
+	if key:
+		cleaned["isbn13"] = f"{key[:3]}-{key[3:]}"
+		if key.startswith("978"):
+			cleaned["isbn10"] = isbnlib.to_isbn10(key)
+
+	for field in BOOK_FIELDS:
+		if cleaned.get(field) != doc.get(field):
+			changes.append(field)
+
+	return cleaned, changes, key
+
+
+def clean_chunk(documents: list) -> list:
+	## Runs in the worker processes, only changed documents are sent back and their size is measured once _rev is bumped
+	results = []
+	for doc in documents:
+		cleaned, changes, key = clean_document(doc)
+		if changes:
+			results.append((cleaned, changes, key, None))
+		else:
+			results.append((None, changes, key, len(json.dumps(doc, ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8"))))
+	return results
+
+
+def completeness(doc: dict) -> int:
+	return sum(1 for field in BOOK_FIELDS if doc.get(field))
+
+
+class CollectionCleaner:
+
+	def __init__(self, db, workers: int = None, chunk_size: int = 2000):
+		self.db = db
+		self.workers = workers or os.cpu_count() or 1
+		self.chunk_size = chunk_size
+		self.documents = None
+		self.report = None
+
+	def _clean_all(self, documents: list) -> list:
+		chunks = [documents[start:start + self.chunk_size] for start in range(0, len(documents), self.chunk_size)]
+
+		## Starting processes costs more than a small library takes to clean
+		if self.workers <= 1 or len(chunks) <= 1:
+			return [result for chunk in chunks for result in clean_chunk(chunk)]
+
+		## spawn, forking a process that runs Qt and camera threads is not safe
+		with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)), mp_context=multiprocessing.get_context("spawn")) as executor:
+			return [result for results in executor.map(clean_chunk, chunks) for result in results]
+
+	def plan(self) -> dict:
+		started = time.perf_counter()
+
+		with metrics.span("maintenance.plan"):
+			version = self.db.version()
+			documents = [doc for doc in self.db.find() if isinstance(doc, dict)]
+			results = self._clean_all(documents)
+
+			fields = {}
+			cleaned = set()
+			sizes = {}
+			books = []
+			for position, (doc, (cleaned_doc, changes, key, size)) in enumerate(zip(documents, results)):
+				if changes:
+					cleaned.add(position)
+					for field in changes:
+						fields[field] = fields.get(field, 0) + 1
+				books.append(cleaned_doc or doc)
+				sizes[position] = size
+
+			## Hash index of canonical ISBNs, books without a valid ISBN are never merged
+			index = {}
+			for position, (_, _, key, _) in enumerate(results):
+				if key:
+					index.setdefault(key, []).append(position)
+
+			duplicates = []
+			removed = set()
+			for key, positions in index.items():
+				if len(positions) < 2:
+					continue
+
+				## The most complete copy is kept, the oldest one on a tie, and gets the fields only the others have
+				keep = max(positions, key=lambda position: (completeness(books[position]), -position))
+				others = [position for position in positions if position != keep]
+
+				merged = dict(books[keep])
+				for position in others:
+					for field in BOOK_FIELDS:
+						if not merged.get(field) and books[position].get(field):
+							merged[field] = books[position][field]
+
+				if merged != books[keep]:
+					books[keep] = merged
+					cleaned.add(keep)
+
+				removed.update(others)
+				duplicates.append({
+					"isbn13": key,
+					"keep": books[keep].get("_id"),
+					"remove": [books[position].get("_id") for position in others],
+					"title": books[keep].get("title", ""),
+				})
+
+			kept = [position for position in range(len(books)) if position not in removed]
+			for position in cleaned - removed:
+				books[position]["_rev"] = books[position].get("_rev", 0) + 1
+				sizes[position] = len(json.dumps(books[position], ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8"))
+			self.documents = [books[position] for position in kept]
+
+		bytes_before = version[2]
+		## BasicDB writes a comma between documents and brackets around them
+		bytes_after = sum(sizes[position] for position in kept) + max(len(kept) - 1, 0) + 2
+
+		self.report = {
+			"version": version,
+			"documents": len(documents),
+			"cleaned": len(cleaned - removed),
+			"fields": fields,
+			"duplicate_groups": len(duplicates),
+			"removed": len(removed),
+			"duplicates": duplicates,
+			"bytes_before": bytes_before,
+			"bytes_after": bytes_after,
+			"seconds": time.perf_counter() - started,
+		}
+		return self.report
+
+	def apply(self) -> dict:
+		with self.db.lock:
+			## Someone wrote the collection since the dry run, the plan is made again on what is there now
+			if self.report is None or self.db.version() != tuple(self.report["version"]):
+				self.plan()
+
+			if self.report["cleaned"] or self.report["removed"]:
+				with metrics.span("maintenance.apply"):
+					self.db._write_all_documents(self.documents)
+				print(f"[INFO] - Cleaned {self.report['cleaned']} books and removed {self.report['removed']} duplicates")
+
+		return self.report
+
+	def summary(self) -> str:
+		report = self.report
+		lines = [
+			f"{report['documents']} books checked in {report['seconds']:.1f} s",
+			f"{report['cleaned']} books to clean up: " + (", ".join(f"{field} {count}" for field, count in sorted(report["fields"].items())) or "none"),
+			f"{report['duplicate_groups']} duplicated ISBNs, {report['removed']} copies to remove",
+			f"{report['bytes_before'] / 1024:.0f} KB -> {report['bytes_after'] / 1024:.0f} KB",
+		]
+		for group in report["duplicates"]:
+			lines.append(f"  {group['isbn13']}  {group['title']}  keeps {group['keep']}, removes {', '.join(group['remove'])}")
+		return "\n".join(lines)
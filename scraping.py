@@ -0,0 +1,1355 @@
+import os
+import re
+import json
+import copy
+import mmap
+import heapq
+import struct
+import tempfile
+import time
+import random
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlparse
+import requests
+import aiohttp
+from bs4 import BeautifulSoup
+import isbnlib
+try:
+	import lxml
+	HTML_PARSER = "lxml"
+except ImportError:
+	HTML_PARSER = "html.parser"
+
+from core import canonical_isbn13, document_isbn13, metrics
+
+
+class ScraperCache:
+
+	def __init__(self, root_dir: str, ttl: int = 60 * 60 * 24 * 30, max_entries: int = 5000, hot_entries: int = 256):
+		self.base_dir = os.path.join(os.path.dirname(root_dir), "data", "scraper_cache")
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self.hot_entries = hot_entries
+
+		## In-memory hot tier, most recently used entries last
+		self._hot = OrderedDict()
+		self._lock = threading.Lock()
+
+		os.makedirs(self.base_dir, exist_ok=True)
+		self._disk_count = len(self._list_entry_files())
+
+	@staticmethod
+	def key(_isbn: str) -> str:
+		return canonical_isbn13(_isbn)
+
+	def _entry_path(self, key: str) -> str:
+		return os.path.join(self.base_dir, f"{key}.json")
+
+	def _list_entry_files(self) -> list:
+		return [entry for entry in os.scandir(self.base_dir) if entry.name.endswith(".json")]
+
+	def _is_expired(self, entry: dict) -> bool:
+		return self.ttl is not None and time.time() - entry["stored_at"] > self.ttl
+
+	def get(self, _isbn: str) -> dict | None:
+		key = self.key(_isbn)
+
+		with self._lock:
+			entry = self._hot.get(key)
+			if entry is not None:
+				if not self._is_expired(entry):
+					self._hot.move_to_end(key)
+					return copy.deepcopy(entry["result"])
+				del self._hot[key]
+
+			path = self._entry_path(key)
+			try:
+				with open(path, mode="r", encoding="utf-8") as file:
+					entry = json.load(file)
+			except (FileNotFoundError, json.JSONDecodeError):
+				return None
+
+			if self._is_expired(entry):
+				self._remove_entry_file(path)
+				return None
+
+			## Touch the file so disk eviction sees it as recently used
+			os.utime(path)
+			self._remember(key, entry)
+
+			return copy.deepcopy(entry["result"])
+
+	def put(self, _isbn: str, result: dict):
+		key = self.key(_isbn)
+		entry = {"stored_at": time.time(), "result": copy.deepcopy(result)}
+
+		with self._lock:
+			path = self._entry_path(key)
+			is_new = not os.path.exists(path)
+
+			tmp_path = f"{path}.tmp"
+			with open(tmp_path, mode="w", encoding="utf-8") as file:
+				json.dump(entry, file, ensure_ascii=False)
+			os.replace(tmp_path, path)
+
+			if is_new:
+				self._disk_count += 1
+
+			self._remember(key, entry)
+			self._evict_disk()
+
+	def _remember(self, key: str, entry: dict):
+		self._hot[key] = entry
+		self._hot.move_to_end(key)
+		while len(self._hot) > self.hot_entries:
+			self._hot.popitem(last=False)
+
+	def _remove_entry_file(self, path: str):
+		try:
+			os.remove(path)
+			self._disk_count -= 1
+		except FileNotFoundError:
+			pass
+
+	def _evict_disk(self):
+		if self._disk_count <= self.max_entries:
+			return
+
+		entries = sorted(self._list_entry_files(), key=lambda entry: entry.stat().st_mtime)
+		self._disk_count = len(entries)
+
+		for entry in entries[:max(0, len(entries) - self.max_entries)]:
+			self._hot.pop(entry.name[:-len(".json")], None)
+			self._remove_entry_file(entry.path)
+
+	def clear(self):
+		with self._lock:
+			self._hot.clear()
+			for entry in self._list_entry_files():
+				self._remove_entry_file(entry.path)
+
+	def prune(self) -> int:
+		with self._lock:
+			entries = self._list_entry_files()
+			for entry in entries:
+				try:
+					with open(entry.path, mode="r", encoding="utf-8") as file:
+						expired = self._is_expired(json.load(file))
+				except (json.JSONDecodeError, KeyError):
+					expired = True
+
+				if expired:
+					self._hot.pop(entry.name[:-len(".json")], None)
+					self._remove_entry_file(entry.path)
+
+			self._evict_disk()
+			self._disk_count = len(self._list_entry_files())
+
+			return len(entries) - self._disk_count
+
+
+class RateLimiter:
+
+	def __init__(self, requests_per_second: float = 1.0):
+		self.interval = 1.0 / requests_per_second
+		self._next_slot = {}
+		self._lock = threading.Lock()
+
+	def wait(self, host: str):
+		with self._lock:
+			now = time.monotonic()
+			slot = max(now, self._next_slot.get(host, now))
+			self._next_slot[host] = slot + self.interval
+
+		if slot > now:
+			time.sleep(slot - now)
+
+
+class CoverStore:
+
+	## Open Library answers 404 instead of a blank placeholder with default=false
+	COVER_URL = "https://covers.openlibrary.org/b/isbn/{isbn13}-M.jpg?default=false"
+
+	def __init__(self, root_dir: str, url: str = None, missing_ttl: int = 60 * 60 * 24 * 7, refused_ttl: int = 60 * 15, max_entries: int = 50_000, rate_limiter: RateLimiter = None):
+		self.base_dir = os.path.join(os.path.dirname(root_dir), "data", "covers")
+		self.url = url or self.COVER_URL
+		self.missing_ttl = missing_ttl
+		self.refused_ttl = refused_ttl
+		self.max_entries = max_entries
+		self.rate_limiter = rate_limiter
+		self._lock = threading.Lock()
+		self._local = threading.local()
+
+		## Refused requests (403, 429) by key, with the monotonic time they may be tried again
+		self._refused = {}
+
+		os.makedirs(self.base_dir, exist_ok=True)
+		self._disk_count = len(self._list_thumbnail_files())
+
+	@staticmethod
+	def key(_isbn: str) -> str | None:
+		return canonical_isbn13(_isbn) or None
+
+	def _path(self, key: str, extension: str = "jpg") -> str:
+		return os.path.join(self.base_dir, f"{key}.{extension}")
+
+	def _list_thumbnail_files(self) -> list:
+		return [entry for entry in os.scandir(self.base_dir) if entry.name.endswith(".jpg")]
+
+	def get(self, _isbn: str) -> bytes | None:
+		key = self.key(_isbn)
+		if not key:
+			return None
+
+		try:
+			with open(self._path(key), mode="rb") as file:
+				return file.read()
+		except FileNotFoundError:
+			return None
+
+	def put(self, _isbn: str, thumbnail: bytes):
+		key = self.key(_isbn)
+		if not key:
+			return
+
+		path = self._path(key)
+		with self._lock:
+			is_new = not os.path.exists(path)
+
+			## Thumbnails are written by several workers, a half written one must never be read
+			tmp_path = f"{path}.{threading.get_ident()}.tmp"
+			with open(tmp_path, mode="wb") as file:
+				file.write(thumbnail)
+			os.replace(tmp_path, path)
+
+			if is_new:
+				self._disk_count += 1
+			self._evict_disk()
+
+	def is_missing(self, _isbn: str) -> bool:
+		key = self.key(_isbn)
+		if not key:
+			return True
+
+		## Books without a cover are remembered for a while so they are not fetched on every scroll
+		try:
+			return time.time() - os.path.getmtime(self._path(key, "missing")) < self.missing_ttl
+		except FileNotFoundError:
+			return False
+
+	def is_refused(self, _isbn: str) -> bool:
+		key = self.key(_isbn)
+
+		with self._lock:
+			retry_at = self._refused.get(key)
+			if retry_at is None:
+				return False
+			if time.monotonic() < retry_at:
+				return True
+			del self._refused[key]
+			return False
+
+	def _session(self) -> requests.Session:
+		if not hasattr(self._local, "session"):
+			self._local.session = requests.Session()
+		return self._local.session
+
+	def fetch(self, _isbn: str, timeout: float = 15) -> bytes | None:
+		key = self.key(_isbn)
+		if not key:
+			return None
+
+		url = self.url.format(isbn13=key, isbn10=isbnlib.to_isbn10(key) or "")
+		if self.rate_limiter:
+			self.rate_limiter.wait(urlparse(url).netloc)
+
+		with metrics.span("covers.fetch"):
+			response = self._session().get(url=url, headers=BookScraper.HEADERS, timeout=timeout)
+
+		if response.status_code == 404:
+			with open(self._path(key, "missing"), mode="w", encoding="utf-8"):
+				pass
+			return None
+
+		## Refusals only last a while, they are remembered in memory instead of on disk
+		if response.status_code in (403, 429):
+			retry_after = response.headers.get("Retry-After", "")
+			ttl = max(self.refused_ttl, int(retry_after)) if retry_after.isdigit() else self.refused_ttl
+			with self._lock:
+				self._refused[key] = time.monotonic() + ttl
+
+		## Refusals and server errors raise, so the cover is not mistaken for a missing one
+		response.raise_for_status()
+		return response.content
+
+	def _evict_disk(self):
+		if self._disk_count <= self.max_entries:
+			return
+
+		entries = sorted(self._list_thumbnail_files(), key=lambda entry: entry.stat().st_mtime)
+		self._disk_count = len(entries)
+
+		for entry in entries[:max(0, len(entries) - self.max_entries)]:
+			try:
+				os.remove(entry.path)
+				self._disk_count -= 1
+			except FileNotFoundError:
+				pass
+
+
+class InFlightRegistry:
+
+	def __init__(self):
+		self._in_flight = {}
+		self._lock = threading.Lock()
+
+		self.started = 0
+		self.coalesced = 0
+
+	def submit(self, _isbn: str, start_lookup) -> Future:
+		## Invalid input keeps its own key, its lookup fails on its own
+		key = ScraperCache.key(_isbn) or _isbn
+
+		with self._lock:
+			future = self._in_flight.get(key)
+
+			## A cancelled lookup is about to be forgotten, never join it
+			if future is not None and not future.cancelled():
+				self.coalesced += 1
+				print(f"[INFO] - {key} joined a pending lookup ({self.coalesced} coalesced so far)")
+				return future
+
+			future = start_lookup(_isbn)
+			self._in_flight[key] = future
+			self.started += 1
+
+		## Added outside the lock, it runs right away if the lookup already finished
+		future.add_done_callback(lambda future: self._forget(key, future))
+
+		return future
+
+	def _forget(self, key: str, future: Future):
+		with self._lock:
+			if self._in_flight.get(key) is future:
+				del self._in_flight[key]
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {"started": self.started, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+class BookScraper:
+
+	HEADERS = {
+		'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+		'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
+		'Accept-Language': 'en-US,en;q=0.9,tr;q=0.8',
+		'Connection': 'keep-alive',
+		'Upgrade-Insecure-Requests': '1',
+		# 'Referer': 'https://www.google.com/'
+	}
+
+	FIELDS = ("title", "author", "publisher", "publication_date", "isbn10", "isbn13", "page_count", "language", "description")
+
+	DETAIL_LABELS = (
+		("Publisher", "publisher"),
+		("Publication date", "publication_date"),
+		("ISBN-10", "isbn10"),
+		("ISBN-13", "isbn13"),
+		("Print length", "page_count"),
+		("Language", "language"),
+	)
+
+	REGION_MARKERS = (
+		re.compile(r'id="productTitle"'),
+		re.compile(r'class="(?:[^"]*\s)?author(?:\s[^"]*)?"'),
+		re.compile(r'id="detailBullets_feature_div"'),
+		re.compile(r'id="bookDescription_feature_div"'),
+	)
+
+	_TAG_PATTERNS = {}
+
+	def __init__(self, cache: ScraperCache = None, offline: bool = False, rate_limiter: RateLimiter = None, base_url: str = "https://www.amazon.com/dp/", provider_chain: "ProviderChain" = None):
+		self.cache = cache
+		self.offline = offline
+		self.rate_limiter = rate_limiter
+		self.provider_chain = provider_chain or ProviderChain([AmazonProvider(base_url)])
+
+	def scrape(self, _isbn: str) -> dict:
+
+		## 979 books have no ISBN-10, everything is keyed on the ISBN-13
+		_isbn13 = canonical_isbn13(_isbn)
+
+		if not _isbn13:
+			raise ValueError("You should enter a valid ISBN.")
+
+		if self.cache:
+			cached_book = self.cache.get(_isbn13)
+			if cached_book:
+				return cached_book
+
+		## Offline lookups are served by the cache and local dumps only
+		try:
+			scraped_book = self.provider_chain.lookup(_isbn13, rate_limiter=self.rate_limiter, local_only=self.offline)
+		except LookupError:
+			if self.offline:
+				raise LookupError(f"{_isbn} is not in the offline cache or local dumps")
+			raise
+
+		## Pages without a title are captchas or errors, never cache them
+		if self.cache and scraped_book["title"]:
+			self.cache.put(_isbn13, scraped_book)
+
+		return scraped_book
+
+	@staticmethod
+	def find_region(html: str, marker: re.Pattern) -> str:
+
+		match = marker.search(html)
+		if not match:
+			return ""
+
+		## Walk back to the opening tag and forward to its balanced closing tag
+		start = html.rfind("<", 0, match.start())
+		tag = re.match(r"<([a-zA-Z][a-zA-Z0-9]*)", html[start:start + 16])
+		if not tag:
+			return ""
+
+		tag_pattern = BookScraper._TAG_PATTERNS.get(tag.group(1).lower())
+		if tag_pattern is None:
+			tag_pattern = re.compile(rf"<(/?){tag.group(1)}\b", re.IGNORECASE)
+			BookScraper._TAG_PATTERNS[tag.group(1).lower()] = tag_pattern
+
+		depth = 0
+		for tag_match in tag_pattern.finditer(html, start):
+			depth += -1 if tag_match.group(1) else 1
+			if depth == 0:
+				return html[start:html.find(">", tag_match.end()) + 1]
+
+		return html[start:]
+
+	@staticmethod
+	def parse_page(html: str) -> dict:
+
+		## Product pages are huge, only the few regions holding book data get parsed
+		regions = "".join(BookScraper.find_region(html, marker) for marker in BookScraper.REGION_MARKERS)
+		soup = BeautifulSoup(regions, HTML_PARSER)
+
+		scraped_book = dict.fromkeys(BookScraper.FIELDS, "")
+
+		title_tag = soup.find(id="productTitle")
+		if title_tag:
+			scraped_book["title"] = title_tag.text.strip()
+
+		# +++++++++ Translator
+		author_tag = soup.find(class_="author")
+		if author_tag and author_tag.a:
+			scraped_book["author"] = author_tag.a.text # Author
+
+		details_tag = soup.find(id="detailBullets_feature_div")
+		details_list = details_tag.find("ul") if details_tag else None
+
+		for i in details_list.find_all(class_="a-list-item") if details_list else []:
+
+			spans = i.find_all("span", limit=2)
+			if len(spans) < 2:
+				continue
+
+			label = spans[0].text
+			for label_text, field in BookScraper.DETAIL_LABELS:
+				if label_text in label:
+					scraped_book[field] = spans[1].text
+					break
+
+		description_tag = soup.find(id="bookDescription_feature_div")
+		if description_tag:
+			scraped_book["description"] = description_tag.text.strip().replace(" Read more", "") # Description
+
+		# price = soup.find(class_="slot-price").text.strip().replace("from ", "") # Price
+
+		return scraped_book
+
+	@staticmethod
+	def to_document(scraped_book: dict, _isbn: str = None) -> dict:
+		isbn10 = scraped_book["isbn10"]
+		isbn13 = scraped_book["isbn13"]
+
+		## Providers do not always return the ISBN, the one that was looked up is stored instead so the book can be found again
+		key = canonical_isbn13(_isbn)
+		if key:
+			isbn13 = isbn13 or f"{key[:3]}-{key[3:]}"
+			isbn10 = isbn10 or isbnlib.to_isbn10(key) or ""
+
+		return {
+			"title": scraped_book["title"],
+			"authors": scraped_book["author"],
+			"publisher": scraped_book["publisher"],
+			"publicationDate": scraped_book["publication_date"],
+			"isbn10": isbn10,
+			"isbn13": isbn13,
+			"pageCount": scraped_book["page_count"],
+			"language": scraped_book["language"],
+			"genres": "",
+			"description": scraped_book["description"]
+		}
+
+
+class BookNotFoundError(LookupError):
+	## Every source answered and none has the book, asking again will not change that
+	pass
+
+
+class MetadataProvider:
+
+	name = ""
+	is_local = False
+	## An answer without a title means the source does not have the book
+	reports_misses = True
+
+	def __init__(self, base_url: str):
+		self.base_url = base_url
+		self.headers = dict(BookScraper.HEADERS)
+
+		## requests.Session is not thread-safe, every thread gets its own
+		self._local = threading.local()
+
+	def supports(self, _isbn13: str) -> bool:
+		return True
+
+	def url(self, _isbn13: str) -> str:
+		raise NotImplementedError
+
+	def parse(self, text: str) -> dict:
+		raise NotImplementedError
+
+	def is_refused(self, _isbn: str) -> bool:
+		key = self.key(_isbn)
+
+		with self._lock:
+			retry_at = self._refused.get(key)
+			if retry_at is None:
+				return False
+			if time.monotonic() < retry_at:
+				return True
+			del self._refused[key]
+			return False
+
+	def _session(self) -> requests.Session:
+		if not hasattr(self._local, "session"):
+			self._local.session = requests.Session()
+		return self._local.session
+
+	def fetch(self, _isbn13: str, cancel: threading.Event = None, timeout: float = 15) -> dict:
+		with metrics.span(f"scrape.fetch.{self.name}"), self._session().get(url=self.url(_isbn13), headers=self.headers, timeout=timeout, stream=True) as page:
+			if page.status_code == 404:
+				raise BookNotFoundError(f"{self.name} does not have {_isbn13}")
+			page.raise_for_status()
+
+			## Streaming lets a hedged request that lost the race stop downloading
+			chunks = []
+			for chunk in page.iter_content(chunk_size=64 * 1024):
+				if cancel is not None and cancel.is_set():
+					raise CancelledError(f"{self.name} lookup was cancelled")
+				chunks.append(chunk)
+
+			text = b"".join(chunks).decode(page.encoding or "utf-8", errors="replace")
+
+		with metrics.span(f"scrape.parse.{self.name}"):
+			return self.parse(text)
+
+
+class AmazonProvider(MetadataProvider):
+
+	name = "amazon"
+	## A product page without a title can be a captcha
+	reports_misses = False
+
+	def __init__(self, base_url: str = "https://www.amazon.com/dp/"):
+		super().__init__(base_url)
+
+	def supports(self, _isbn13: str) -> bool:
+		## Product pages are found by ISBN-10, 979 books have none
+		return bool(isbnlib.to_isbn10(_isbn13))
+
+	def url(self, _isbn13: str) -> str:
+		return f"{self.base_url}{isbnlib.to_isbn10(_isbn13)}"
+
+	def parse(self, text: str) -> dict:
+		return BookScraper.parse_page(text)
+
+
+class OpenLibraryProvider(MetadataProvider):
+
+	name = "openlibrary"
+
+	def __init__(self, base_url: str = "https://openlibrary.org/api/books"):
+		super().__init__(base_url)
+
+	def url(self, _isbn13: str) -> str:
+		return f"{self.base_url}?bibkeys=ISBN:{_isbn13}&format=json&jscmd=data"
+
+	def parse(self, text: str) -> dict:
+		scraped_book = dict.fromkeys(BookScraper.FIELDS, "")
+
+		book = next(iter(json.loads(text).values()), None)
+		if not book:
+			return scraped_book
+
+		identifiers = book.get("identifiers", {})
+
+		scraped_book["title"] = book.get("title", "")
+		scraped_book["author"] = ", ".join(author["name"] for author in book.get("authors", []))
+		scraped_book["publisher"] = ", ".join(publisher["name"] for publisher in book.get("publishers", []))
+		scraped_book["publication_date"] = book.get("publish_date", "")
+		scraped_book["isbn10"] = identifiers.get("isbn_10", [""])[0]
+		scraped_book["isbn13"] = identifiers.get("isbn_13", [""])[0]
+		scraped_book["page_count"] = f"{book['number_of_pages']} pages" if book.get("number_of_pages") else ""
+
+		return scraped_book
+
+
+class GoogleBooksProvider(MetadataProvider):
+
+	name = "googlebooks"
+
+	def __init__(self, base_url: str = "https://www.googleapis.com/books/v1/volumes"):
+		super().__init__(base_url)
+
+	def url(self, _isbn13: str) -> str:
+		return f"{self.base_url}?q=isbn:{_isbn13}"
+
+	def parse(self, text: str) -> dict:
+		scraped_book = dict.fromkeys(BookScraper.FIELDS, "")
+
+		items = json.loads(text).get("items")
+		if not items:
+			return scraped_book
+
+		book = items[0].get("volumeInfo", {})
+		identifiers = {identifier["type"]: identifier["identifier"] for identifier in book.get("industryIdentifiers", [])}
+
+		scraped_book["title"] = book.get("title", "")
+		scraped_book["author"] = ", ".join(book.get("authors", []))
+		scraped_book["publisher"] = book.get("publisher", "")
+		scraped_book["publication_date"] = book.get("publishedDate", "")
+		scraped_book["isbn10"] = identifiers.get("ISBN_10", "")
+		scraped_book["isbn13"] = identifiers.get("ISBN_13", "")
+		scraped_book["page_count"] = f"{book['pageCount']} pages" if book.get("pageCount") else ""
+		scraped_book["language"] = book.get("language", "")
+		scraped_book["description"] = book.get("description", "")
+
+		return scraped_book
+
+
+class LocalDumpProvider(MetadataProvider):
+
+	name = "localdump"
+	is_local = True
+
+	INDEX_MAGIC = b"HLCIDX01"
+	INDEX_HEADER = struct.Struct("<8sQQQ")
+	INDEX_RECORD = struct.Struct("<QQ")
+	ISBN_PATTERN = re.compile(rb'"isbn_?1[03]"\s*:\s*(\[[^\]]*\]|"[^"]*")')
+	ISBN_VALUE_PATTERN = re.compile(rb"[0-9Xx][0-9Xx\- ]{8,16}[0-9Xx]")
+
+	def __init__(self, dump_path: str, index_path: str = None, chunk_size: int = 1_000_000):
+		super().__init__(f"file://{os.path.abspath(dump_path)}")
+		self.dump_path = dump_path
+		self.index_path = index_path or f"{dump_path}.isbnidx"
+		self.chunk_size = chunk_size
+
+		self._index = None
+		self._count = 0
+		self._dump = None
+		self._lock = threading.Lock()
+
+	def url(self, _isbn13: str) -> str:
+		return self.base_url
+
+	@property
+	def is_ready(self) -> bool:
+		return self._index is not None
+
+	def _dump_signature(self) -> tuple:
+		stat = os.stat(self.dump_path)
+		return stat.st_size, stat.st_mtime_ns
+
+	def _index_is_valid(self) -> bool:
+		try:
+			with open(self.index_path, mode="rb") as file:
+				magic, dump_size, dump_mtime, _ = self.INDEX_HEADER.unpack(file.read(self.INDEX_HEADER.size))
+		except (FileNotFoundError, struct.error):
+			return False
+
+		return magic == self.INDEX_MAGIC and (dump_size, dump_mtime) == self._dump_signature()
+
+	@classmethod
+	def _record_isbns(cls, line: bytes) -> set:
+		isbns = set()
+
+		for match in cls.ISBN_PATTERN.finditer(line):
+			for value in cls.ISBN_VALUE_PATTERN.findall(match.group(1)):
+				key = canonical_isbn13(value.decode("ascii"))
+				if key:
+					isbns.add(int(key))
+
+		return isbns
+
+	def _write_run(self, entries: list, runs: list):
+		entries.sort()
+		run = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(self.index_path)))
+		run.write(b"".join(self.INDEX_RECORD.pack(*entry) for entry in entries))
+		run.seek(0)
+		runs.append(run)
+		entries.clear()
+
+	def _read_run(self, run):
+		while True:
+			data = run.read(self.INDEX_RECORD.size * 8192)
+			if not data:
+				return
+			yield from self.INDEX_RECORD.iter_unpack(data)
+
+	def build_index(self):
+
+		started = time.perf_counter()
+		dump_size, dump_mtime = self._dump_signature()
+
+		## External sort, sorted runs of chunk_size entries are merged so memory stays bounded
+		runs = []
+		entries = []
+		with open(self.dump_path, mode="rb") as dump:
+			offset = 0
+			for line in dump:
+				for _isbn in self._record_isbns(line):
+					entries.append((_isbn, offset))
+				offset += len(line)
+
+				if len(entries) >= self.chunk_size:
+					self._write_run(entries, runs)
+
+		if entries or not runs:
+			self._write_run(entries, runs)
+
+		tmp_path = f"{self.index_path}.tmp"
+		count = 0
+		with open(tmp_path, mode="wb") as index:
+			index.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, dump_size, dump_mtime, 0))
+
+			buffer = []
+			for entry in heapq.merge(*(self._read_run(run) for run in runs)):
+				buffer.append(self.INDEX_RECORD.pack(*entry))
+				count += 1
+				if len(buffer) >= 8192:
+					index.write(b"".join(buffer))
+					buffer.clear()
+			index.write(b"".join(buffer))
+
+			index.seek(0)
+			index.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, dump_size, dump_mtime, count))
+
+		for run in runs:
+			run.close()
+
+		os.replace(tmp_path, self.index_path)
+		print(f"[INFO] - Indexed {count} ISBNs from '{self.dump_path}' in {time.perf_counter() - started:.1f}s")
+
+	def ensure_index(self):
+		with self._lock:
+			if self._index is not None:
+				return
+
+			if not self._index_is_valid():
+				with metrics.span("index.build"):
+					self.build_index()
+
+			with open(self.index_path, mode="rb") as file:
+				self._index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+			self._count = self.INDEX_HEADER.unpack_from(self._index, 0)[3]
+			self._dump = open(self.dump_path, mode="rb")
+
+	def find_offset(self, isbn13: str) -> int | None:
+		key = int(isbn13)
+		index = self._index
+		header_size = self.INDEX_HEADER.size
+		record_size = self.INDEX_RECORD.size
+
+		low, high = 0, self._count
+		while low < high:
+			middle = (low + high) // 2
+			if self.INDEX_RECORD.unpack_from(index, header_size + middle * record_size)[0] < key:
+				low = middle + 1
+			else:
+				high = middle
+
+		if low < self._count:
+			found_key, offset = self.INDEX_RECORD.unpack_from(index, header_size + low * record_size)
+			if found_key == key:
+				return offset
+
+		return None
+
+	def fetch(self, _isbn13: str, cancel: threading.Event = None, timeout: float = 15) -> dict:
+		if not self.is_ready:
+			raise LookupError(f"{self.name} index is not ready yet")
+
+		with metrics.span("index.lookup"):
+			offset = self.find_offset(_isbn13)
+		if offset is None:
+			return dict.fromkeys(BookScraper.FIELDS, "")
+
+		with self._lock:
+			self._dump.seek(offset)
+			line = self._dump.readline()
+
+		with metrics.span(f"scrape.parse.{self.name}"):
+			return self.parse(line.decode("utf-8"))
+
+	def parse(self, text: str) -> dict:
+		## Plain JSON lines, or Open Library dump rows where the JSON is the last column
+		record = json.loads(text[text.index("{"):])
+		scraped_book = dict.fromkeys(BookScraper.FIELDS, "")
+
+		for field in BookScraper.FIELDS:
+			if isinstance(record.get(field), str):
+				scraped_book[field] = record[field]
+
+		def names(values) -> str:
+			if isinstance(values, str):
+				return values
+			return ", ".join(value["name"] if isinstance(value, dict) else str(value) for value in values or [] if not isinstance(value, dict) or "name" in value)
+
+		def first(values) -> str:
+			return values[0] if isinstance(values, list) and values else values if isinstance(values, str) else ""
+
+		description = record.get("description", "")
+		languages = record.get("languages", [])
+
+		scraped_book["author"] = scraped_book["author"] or names(record.get("authors", ""))
+		scraped_book["publisher"] = scraped_book["publisher"] or names(record.get("publishers", ""))
+		scraped_book["publication_date"] = scraped_book["publication_date"] or record.get("publish_date", "")
+		scraped_book["isbn10"] = scraped_book["isbn10"] or first(record.get("isbn_10"))
+		scraped_book["isbn13"] = scraped_book["isbn13"] or first(record.get("isbn_13"))
+		scraped_book["page_count"] = scraped_book["page_count"] or (f"{record['number_of_pages']} pages" if record.get("number_of_pages") else "")
+		scraped_book["language"] = scraped_book["language"] or ", ".join(language["key"].rsplit("/", 1)[-1] for language in languages if isinstance(language, dict) and "key" in language)
+		scraped_book["description"] = scraped_book["description"] or (description.get("value", "") if isinstance(description, dict) else description)
+
+		return scraped_book
+
+
+class ProviderStats:
+
+	def __init__(self):
+		self.requests = 0
+		self.successes = 0
+		self.failures = 0
+		self.cancelled = 0
+		self.latencies = deque(maxlen=200)
+
+	def to_dict(self) -> dict:
+		latencies = sorted(self.latencies)
+		return {
+			"requests": self.requests,
+			"successes": self.successes,
+			"failures": self.failures,
+			"cancelled": self.cancelled,
+			"success_rate": self.successes / self.requests if self.requests else 0.0,
+			"latency_p50": latencies[len(latencies) // 2] if latencies else None,
+			"latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else None,
+		}
+
+
+class ProviderChain:
+
+	PROVIDERS = {
+		AmazonProvider.name: AmazonProvider,
+		OpenLibraryProvider.name: OpenLibraryProvider,
+		GoogleBooksProvider.name: GoogleBooksProvider,
+	}
+
+	def __init__(self, providers: list, hedge_delay: float | None = 1.5, timeout: float = 20, max_workers: int = 16):
+		self.providers = providers
+		self.hedge_delay = hedge_delay
+		self.timeout = timeout
+		self.stats = {provider.name: ProviderStats() for provider in providers}
+
+		self._lock = threading.Lock()
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ProviderChain") if len(providers) > 1 else None
+
+	@classmethod
+	def from_names(cls, names: str, dump_paths: list = None, **kwargs):
+		providers = [LocalDumpProvider(dump_path) for dump_path in dump_paths or []]
+		providers += [cls.PROVIDERS[name.strip()]() for name in names.split(",") if name.strip()]
+		return cls(providers, **kwargs)
+
+	@staticmethod
+	def env_dump_paths() -> list:
+		## HOLOCRON_DUMPS lists local JSON-lines dumps, separated like PATH, that are searched before the network
+		return [path for path in os.environ.get("HOLOCRON_DUMPS", "").split(os.pathsep) if path]
+
+	@classmethod
+	def from_env(cls, **kwargs):
+		## HOLOCRON_PROVIDERS lists metadata sources in hedging order, HOLOCRON_HEDGE_DELAY=none queries them all at once
+		hedge_delay = os.environ.get("HOLOCRON_HEDGE_DELAY", "1.5")
+		return cls.from_names(
+			os.environ.get("HOLOCRON_PROVIDERS", "amazon,openlibrary,googlebooks"),
+			dump_paths=cls.env_dump_paths(),
+			hedge_delay=None if hedge_delay == "none" else float(hedge_delay),
+			**kwargs
+		)
+
+	@property
+	def network_providers(self) -> list:
+		return [provider for provider in self.providers if not provider.is_local]
+
+	@staticmethod
+	def is_complete(scraped_book: dict) -> bool:
+		return bool(scraped_book["title"] and scraped_book["author"])
+
+	def _call(self, provider: MetadataProvider, _isbn13: str, cancel: threading.Event, rate_limiter: RateLimiter = None) -> dict:
+		stats = self.stats[provider.name]
+
+		if rate_limiter and not provider.is_local:
+			rate_limiter.wait(urlparse(provider.url(_isbn13)).netloc)
+
+		with self._lock:
+			stats.requests += 1
+
+		started = time.perf_counter()
+		try:
+			scraped_book = provider.fetch(_isbn13, cancel=cancel, timeout=self.timeout)
+
+		except CancelledError:
+			with self._lock:
+				stats.cancelled += 1
+			raise
+
+		except Exception:
+			with self._lock:
+				stats.failures += 1
+			raise
+
+		with self._lock:
+			stats.latencies.append(time.perf_counter() - started)
+			if scraped_book["title"]:
+				stats.successes += 1
+			else:
+				stats.failures += 1
+
+		return scraped_book
+
+	def lookup_local(self, _isbn13: str) -> dict | None:
+		best_book = None
+
+		for provider in self.providers:
+			if not provider.is_local or not provider.is_ready:
+				continue
+
+			scraped_book = self._call(provider, _isbn13, None)
+			if self.is_complete(scraped_book):
+				return scraped_book
+			if scraped_book["title"] and best_book is None:
+				best_book = scraped_book
+
+		return best_book
+
+	def lookup(self, _isbn13: str, rate_limiter: RateLimiter = None, local_only: bool = False) -> dict:
+
+		## Local sources answer in microseconds, the network is only used when they miss
+		local_book = self.lookup_local(_isbn13)
+		if local_book and (local_only or self.is_complete(local_book)):
+			return local_book
+
+		network_providers = [provider for provider in self.network_providers if provider.supports(_isbn13)]
+
+		if local_only or not self.network_providers:
+			raise LookupError(f"{_isbn13} was not found in the local sources")
+		if not network_providers:
+			raise BookNotFoundError(f"None of the metadata sources can look up {_isbn13}")
+
+		if self._executor is None or len(network_providers) == 1:
+			scraped_book = self._call(network_providers[0], _isbn13, None, rate_limiter)
+			if not scraped_book["title"] and not local_book and network_providers[0].reports_misses:
+				raise BookNotFoundError(f"{network_providers[0].name} does not have {_isbn13}")
+			return scraped_book
+
+		cancel = threading.Event()
+		remaining_providers = list(network_providers)
+		futures = {}
+
+		def launch_next() -> bool:
+			if not remaining_providers:
+				return False
+			provider = remaining_providers.pop(0)
+			futures[self._executor.submit(self._call, provider, _isbn13, cancel, rate_limiter)] = provider
+			return True
+
+		launch_next()
+		if self.hedge_delay is None:
+			while launch_next():
+				pass
+
+		deadline = time.monotonic() + self.timeout
+		best_book = None
+		errors = []
+		misses = 0
+
+		try:
+			while futures:
+				remaining_time = deadline - time.monotonic()
+				if remaining_time <= 0:
+					raise TimeoutError(f"No provider answered within {self.timeout}s")
+
+				## Wait for the first answer, or hedge with the next provider once the delay passes
+				has_more = bool(remaining_providers) and self.hedge_delay is not None
+				done, _ = wait(futures, timeout=min(self.hedge_delay, remaining_time) if has_more else remaining_time, return_when=FIRST_COMPLETED)
+
+				if not done:
+					launch_next()
+					continue
+
+				for future in done:
+					provider = futures.pop(future)
+
+					try:
+						scraped_book = future.result()
+					except BookNotFoundError:
+						misses += 1
+						launch_next()
+						continue
+					except Exception as err:
+						errors.append(f"{provider.name}: {err}")
+						launch_next()
+						continue
+
+					if not scraped_book["title"] and provider.reports_misses:
+						misses += 1
+
+					if self.is_complete(scraped_book):
+						return scraped_book
+
+					if scraped_book["title"] and (best_book is None or sum(map(bool, scraped_book.values())) > sum(map(bool, best_book.values()))):
+						best_book = scraped_book
+					launch_next()
+
+			if best_book or local_book:
+				return best_book or local_book
+
+			if misses == len(network_providers):
+				raise BookNotFoundError(f"None of the metadata sources has {_isbn13}")
+			raise LookupError("; ".join(errors) or "No provider found the book")
+
+		finally:
+			cancel.set()
+			for future in futures:
+				if future.cancel():
+					with self._lock:
+						self.stats[futures[future].name].cancelled += 1
+
+	def get_stats(self) -> dict:
+		with self._lock:
+			return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+
+class AsyncScraperEngine:
+
+	def __init__(self, cache: ScraperCache = None, offline: bool = False, max_concurrency: int = 200, per_host_concurrency: int = 50, deadline: float = 20.0, base_url: str = "https://www.amazon.com/dp/", provider: MetadataProvider = None):
+		self.cache = cache
+		self.offline = offline
+		self.max_concurrency = max_concurrency
+		self.per_host_concurrency = per_host_concurrency
+		self.deadline = deadline
+		self.provider = provider or AmazonProvider(base_url)
+
+		self._loop = None
+		self._thread = None
+		self._session = None
+		self._semaphore = None
+		self._ready = threading.Event()
+
+	def start(self):
+		if self._thread and self._thread.is_alive():
+			return
+
+		self._ready.clear()
+		self._thread = threading.Thread(target=self._run_loop, name="AsyncScraperEngine", daemon=True)
+		self._thread.start()
+		self._ready.wait()
+
+	def _run_loop(self):
+		self._loop = asyncio.new_event_loop()
+		asyncio.set_event_loop(self._loop)
+		self._semaphore = asyncio.Semaphore(self.max_concurrency)
+		self._loop.call_soon(self._ready.set)
+
+		try:
+			self._loop.run_forever()
+		finally:
+			self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+			self._loop.close()
+
+	def stop(self):
+		if not self._thread or not self._thread.is_alive():
+			return
+
+		asyncio.run_coroutine_threadsafe(self._close_session(), self._loop).result()
+		self._loop.call_soon_threadsafe(self._loop.stop)
+		self._thread.join()
+		self._thread = None
+
+	async def _close_session(self):
+		for task in asyncio.all_tasks():
+			if task is not asyncio.current_task():
+				task.cancel()
+
+		if self._session:
+			await self._session.close()
+			self._session = None
+
+	def submit(self, _isbn: str, signals=None) -> Future:
+		future = asyncio.run_coroutine_threadsafe(self.lookup(_isbn), self._loop)
+
+		if signals:
+			future.add_done_callback(signals.deliver)
+
+		return future
+
+	async def lookup(self, _isbn: str) -> dict:
+
+		_isbn13 = canonical_isbn13(_isbn)
+
+		if not _isbn13:
+			raise ValueError("You should enter a valid ISBN.")
+
+		if self.cache:
+			cached_book = self.cache.get(_isbn13)
+			if cached_book:
+				return cached_book
+
+		if self.offline:
+			raise LookupError(f"{_isbn} is not in the offline cache")
+
+		if not self.provider.supports(_isbn13):
+			raise LookupError(f"{self.provider.name} has no page for {_isbn}")
+
+		## Other lookups run on this thread while the request is awaited, so it is never profiled
+		async with self._semaphore:
+			with metrics.span(f"scrape.fetch.{self.provider.name}", profile=False):
+				text = await asyncio.wait_for(self._fetch(self.provider.url(_isbn13)), timeout=self.deadline)
+
+		## Parsing is CPU bound, keep it off the event loop so other lookups keep flowing
+		scraped_book = await asyncio.get_running_loop().run_in_executor(None, self._parse, text)
+
+		if self.cache and scraped_book["title"]:
+			self.cache.put(_isbn13, scraped_book)
+
+		return scraped_book
+
+	def _parse(self, text: str) -> dict:
+		with metrics.span(f"scrape.parse.{self.provider.name}"):
+			return self.provider.parse(text)
+
+	async def _fetch(self, url: str) -> str:
+		if self._session is None:
+			connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_concurrency)
+			self._session = aiohttp.ClientSession(connector=connector, headers=self.provider.headers)
+
+		async with self._session.get(url) as page:
+			page.raise_for_status()
+			return await page.text()
+
+
+class EventHook:
+	## Stands in for a Qt signal where Qt is not loaded
+	def __init__(self):
+		self._callbacks = []
+
+	def connect(self, callback):
+		self._callbacks.append(callback)
+
+	def emit(self, *args):
+		for callback in self._callbacks:
+			callback(*args)
+
+class BatchEnrichmentEvents:
+	def __init__(self):
+		self.progress = EventHook()
+		self.result = EventHook()
+		self.error = EventHook()
+		self.committed = EventHook()
+		self.finished = EventHook()
+
+
+class BatchEnricher:
+	def __init__(self, isbns, db, cache:ScraperCache=None, offline:bool=False, max_workers:int=4, requests_per_second:float=1.0, max_retries:int=4, backoff:float=1.0, batch_size:int=50, checkpoint_path:str=None, registry:InFlightRegistry=None, provider_chain:ProviderChain=None, signals=None):
+
+		self.isbns = self.load_isbns(isbns) if isinstance(isbns, str) else list(isbns)
+		self.db = db
+		self.cache = cache
+		self.offline = offline
+		self.registry = registry or InFlightRegistry()
+		self.provider_chain = provider_chain
+		self.max_workers = max_workers
+		self.rate_limiter = RateLimiter(requests_per_second)
+		self.max_retries = max_retries
+		self.backoff = backoff
+		self.batch_size = batch_size
+		self.checkpoint_path = checkpoint_path or os.path.join(db.base_dir, f"{db.collection_name}_enrichment.checkpoint.json")
+		self.is_running = False
+
+		## requests.Session is not thread-safe, every pool thread gets its own scraper
+		self._local = threading.local()
+
+		## Qt signals when run from the app, plain callbacks from the command line
+		self.signals = signals or BatchEnrichmentEvents()
+
+	@staticmethod
+	def load_isbns(path: str) -> list:
+		with open(path, mode="r", encoding="utf-8") as file:
+			return file.read().replace(",", " ").replace(";", " ").split()
+
+	def _read_checkpoint(self) -> set:
+		try:
+			with open(self.checkpoint_path, mode="r", encoding="utf-8") as file:
+				return set(json.load(file)["completed"])
+		except (FileNotFoundError, json.JSONDecodeError, KeyError):
+			return set()
+
+	def _write_checkpoint(self, completed: set):
+		tmp_path = f"{self.checkpoint_path}.tmp"
+		with open(tmp_path, mode="w", encoding="utf-8") as file:
+			json.dump({"completed": sorted(completed)}, file)
+		os.replace(tmp_path, self.checkpoint_path)
+
+	def _pending_isbns(self, completed: set) -> list:
+
+		existing = {document_isbn13(doc) for doc in self.db.find()}
+		existing.discard("")
+
+		pending = []
+		seen = set()
+		for _isbn in self.isbns:
+			key = ScraperCache.key(_isbn)
+			if not key:
+				self.signals.error.emit(_isbn, "Invalid ISBN")
+				continue
+
+			if key in seen or key in completed or key in existing:
+				continue
+
+			seen.add(key)
+			pending.append(key)
+
+		return pending
+
+	def _scraper(self) -> BookScraper:
+		if not hasattr(self._local, "scraper"):
+			self._local.scraper = BookScraper(cache=self.cache, offline=self.offline, rate_limiter=self.rate_limiter, provider_chain=self.provider_chain)
+		return self._local.scraper
+
+	def _enrich(self, _isbn: str) -> dict:
+
+		for attempt in range(self.max_retries + 1):
+
+			if not self.is_running:
+				raise InterruptedError("Batch enrichment was stopped")
+
+			try:
+				scraped_book = self._scraper().scrape(_isbn)
+				if not scraped_book["title"]:
+					raise LookupError("No book data on the page")
+				return scraped_book
+
+			## A clean miss from every source is final, timeouts, errors and captcha pages are retried
+			except (ValueError, InterruptedError, BookNotFoundError):
+				raise
+
+			except LookupError:
+				if self.offline:
+					raise
+				if attempt == self.max_retries:
+					raise
+
+			except Exception:
+				if attempt == self.max_retries:
+					raise
+
+			time.sleep(self.backoff * (2 ** attempt) + random.uniform(0, self.backoff))
+
+	def _commit(self, documents: list, keys: list, completed: set):
+		if documents:
+			self.db.create_many(documents)
+		completed.update(keys)
+		self._write_checkpoint(completed)
+		self.signals.committed.emit(len(documents))
+
+	def run(self):
+
+		self.is_running = True
+
+		completed = self._read_checkpoint()
+		pending = self._pending_isbns(completed)
+		total = len(pending)
+
+		documents = []
+		keys = []
+		inserted = 0
+		done = 0
+
+		self.signals.progress.emit(done, total)
+
+		executor = ThreadPoolExecutor(max_workers=self.max_workers)
+		futures = {
+			self.registry.submit(_isbn, lambda _isbn: executor.submit(self._enrich, _isbn)): _isbn
+			for _isbn in pending
+		}
+
+		try:
+			for future in as_completed(futures):
+				_isbn = futures[future]
+
+				try:
+					scraped_book = future.result()
+					if not scraped_book["title"]:
+						raise LookupError("No book data on the page")
+
+				except InterruptedError:
+					break
+
+				except Exception as err:
+					self.signals.error.emit(_isbn, str(err))
+
+				else:
+					self.signals.result.emit(scraped_book)
+					documents.append(BookScraper.to_document(scraped_book, _isbn))
+					keys.append(_isbn)
+
+				done += 1
+				self.signals.progress.emit(done, total)
+
+				if len(documents) >= self.batch_size:
+					self._commit(documents, keys, completed)
+					inserted += len(documents)
+					documents, keys = [], []
+
+				if not self.is_running:
+					break
+
+		finally:
+			executor.shutdown(wait=True, cancel_futures=True)
+
+			self._commit(documents, keys, completed)
+			inserted += len(documents)
+
+			## A run that got through every ISBN does not need to be resumed
+			if self.is_running and done == total and os.path.exists(self.checkpoint_path):
+				os.remove(self.checkpoint_path)
+
+			self.is_running = False
+			self.signals.finished.emit(inserted)
+
+	def stop(self):
+		self.is_running = False
@@ -0,0 +1,335 @@
+import os
+import re
+import sys
+import mmap
+import time
+import struct
+import bisect
+import glob
+from array import array
+import isbnlib
+
+from core import canonical_isbn13, metrics
+
+TOKEN_PATTERN = re.compile(r"\w+")
+ISBN_QUERY_PATTERN = re.compile(r"[0-9Xx][0-9Xx\- ]{8,16}[0-9Xx]")
+ISBN_SEPARATORS_PATTERN = re.compile(r"[^0-9X]")
+
+
+def searchable_text(doc: dict) -> str:
+	## The same fields the search bar looks at, everything but the underscore ones
+	return "\n".join(value for key, value in doc.items() if not key.startswith("_") and isinstance(value, str)).lower()
+
+
+def isbn_forms(search_text: str) -> tuple | None:
+	## Text that reads as an ISBN finds its book however it is written, with or without hyphens, as ISBN-10 or ISBN-13
+	search_text = search_text.strip()
+	if not ISBN_QUERY_PATTERN.fullmatch(search_text):
+		return None
+
+	key = canonical_isbn13(search_text)
+	if not key:
+		return None
+	return (key, isbnlib.to_isbn10(key) or key)
+
+
+def matches(doc: dict, search_text: str, isbn: tuple = None) -> bool:
+	if any(not key.startswith("_") and search_text in value.lower() for key, value in doc.items()):
+		return True
+
+	## The same books the ISBN table of the index finds, a valid ISBN in either field written as either form
+	return isbn is not None and any(ISBN_SEPARATORS_PATTERN.sub("", str(doc.get(field) or "").upper()) in isbn for field in ("isbn13", "isbn10"))
+
+
+def changes(base_documents: list, documents: list) -> tuple:
+	## Safe to run on any thread, what differs from the snapshot's books by position in the snapshot
+	positions = {doc.get("_id"): position for position, doc in enumerate(base_documents)}
+	replaced = {}
+	added = []
+	for doc in documents:
+		position = positions.pop(doc.get("_id"), None)
+		if position is None:
+			added.append(doc)
+		elif base_documents[position] != doc:
+			replaced[position] = doc
+
+	return replaced, set(positions.values()), added
+
+
+class SearchIndex:
+
+	## Header, vocabulary offsets, postings starts, ISBN table, postings, then the vocabulary, one word per line
+	MAGIC = b"HLCSRC01"
+	HEADER = struct.Struct("<8sQQQQQQQQ")
+	ISBN_RECORD = struct.Struct("<QQ")
+
+	## Builds left behind by a crash or a window closed mid build, anything younger may still be installed
+	STALE_BUILD_AGE = 60 * 10
+
+	def __init__(self, collection_path: str, index_path: str = None):
+		self.collection_path = collection_path
+		self.index_path = index_path or f"{collection_path}.searchidx"
+
+		self.version = None
+		self.documents = None
+		self._index = None
+		self._header = None
+		self._patch = None
+
+	@property
+	def is_ready(self) -> bool:
+		return self._index is not None
+
+	@property
+	def patch_version(self) -> tuple | None:
+		return self._patch[0] if self._patch else None
+
+	def can_answer(self, version: tuple) -> bool:
+		return self.is_ready and tuple(version) in (self.version, self.patch_version)
+
+	def patch(self, base_version: tuple, version: tuple, replaced: dict, removed: set, added: list) -> bool:
+		## Writes made since the snapshot are searched on top of it until the rebuild is installed
+		## Only changes read against the snapshot that is mapped now apply to it
+		if not self.is_ready or tuple(base_version) != self.version:
+			return False
+		self._patch = (tuple(version), replaced, removed, added)
+		return True
+
+	def _read_header(self, data) -> tuple | None:
+		try:
+			header = self.HEADER.unpack_from(data, 0)
+		except struct.error:
+			return None
+		return header if header[0] == self.MAGIC else None
+
+	def _sections(self) -> tuple:
+		_, _, _, _, _, tokens, vocabulary_bytes, postings, isbns = self._header
+		offsets = self.HEADER.size
+		starts = offsets + tokens * 4
+		isbn_table = starts + (tokens + 1) * 4
+		postings_start = isbn_table + isbns * self.ISBN_RECORD.size
+		vocabulary = postings_start + postings * 4
+		return offsets, starts, isbn_table, postings_start, vocabulary, vocabulary + vocabulary_bytes
+
+	def _array(self, start: int, count: int) -> memoryview:
+		return memoryview(self._index)[start:start + count * 4].cast("I")
+
+	def load(self, version: tuple, documents: list) -> bool:
+		## Only a snapshot of exactly this collection file is used, anything else is rebuilt
+		try:
+			with open(self.index_path, mode="rb") as file:
+				header = self._read_header(file.read(self.HEADER.size))
+				if header is None or tuple(header[1:4]) != tuple(version) or header[4] != len(documents):
+					return False
+				index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		except (FileNotFoundError, ValueError):
+			return False
+
+		self._attach(index, header, documents, version)
+		return True
+
+	def _attach(self, index, header, documents: list, version: tuple):
+		old_index = self._index
+		self._index = index
+		self._header = header
+		self.documents = list(documents)
+		self.version = tuple(version)
+		self._patch = None
+
+		if old_index is not None:
+			old_index.close()
+
+	def build(self, documents: list, version: tuple) -> str:
+		## Safe to run on any thread, nothing is swapped in until install()
+		started = time.perf_counter()
+
+		with metrics.span("search_index.build"):
+			postings = {}
+			isbns = []
+			for position, doc in enumerate(documents):
+				for token in set(TOKEN_PATTERN.findall(searchable_text(doc))):
+					positions = postings.get(token)
+					if positions is None:
+						postings[token] = positions = array("I")
+					positions.append(position)
+
+				for field in ("isbn13", "isbn10"):
+					key = canonical_isbn13(doc.get(field))
+					if key:
+						isbns.append((int(key), position))
+
+			vocabulary = sorted(postings)
+			isbns = sorted(set(isbns))
+
+			offsets = array("I")
+			starts = array("I")
+			all_postings = array("I")
+			vocabulary_parts = []
+			vocabulary_offset = 0
+			for token in vocabulary:
+				offsets.append(vocabulary_offset)
+				starts.append(len(all_postings))
+				all_postings.extend(postings[token])
+
+				encoded = token.encode("utf-8") + b"\n"
+				vocabulary_parts.append(encoded)
+				vocabulary_offset += len(encoded)
+			starts.append(len(all_postings))
+
+			if sys.byteorder == "big":
+				for values in (offsets, starts, all_postings):
+					values.byteswap()
+
+			tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+			try:
+				with open(tmp_path, mode="wb") as file:
+					file.write(self.HEADER.pack(self.MAGIC, *version, len(documents), len(vocabulary), vocabulary_offset, len(all_postings), len(isbns)))
+					offsets.tofile(file)
+					starts.tofile(file)
+					file.write(b"".join(self.ISBN_RECORD.pack(*entry) for entry in isbns))
+					all_postings.tofile(file)
+					file.write(b"".join(vocabulary_parts))
+			except BaseException:
+				self.discard(tmp_path)
+				raise
+
+		print(f"[INFO] - Search index of {len(documents)} books built in {time.perf_counter() - started:.1f}s ({len(vocabulary)} words, {len(all_postings)} postings)")
+		return tmp_path
+
+	def install(self, tmp_path: str, documents: list, version: tuple) -> bool:
+		## Called on the thread that searches, the old mapping is closed before the file is replaced
+		if self._index is not None:
+			self._index.close()
+			self._index = None
+			self.version = None
+			self._patch = None
+
+		try:
+			os.replace(tmp_path, self.index_path)
+		except OSError as e:
+			print(f"[ERROR] - Search index could not be saved: {e}")
+			self.discard(tmp_path)
+			return False
+		return self.load(version, documents)
+
+	@staticmethod
+	def discard(tmp_path: str):
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+
+	def remove_stale_builds(self) -> int:
+		removed = 0
+		for tmp_path in glob.glob(f"{glob.escape(self.index_path)}.*.tmp"):
+			try:
+				if time.time() - os.path.getmtime(tmp_path) < self.STALE_BUILD_AGE:
+					continue
+				os.remove(tmp_path)
+				removed += 1
+			except OSError:
+				pass
+		return removed
+
+	def _positions(self, token: str) -> set | None:
+		index = self._index
+		offsets_start, starts_start, _, postings_start, vocabulary, vocabulary_end = self._sections()
+		tokens = self._header[5]
+		offsets = self._array(offsets_start, tokens)
+		starts = self._array(starts_start, tokens + 1)
+
+		## Every word of the vocabulary holding the token, found in the vocabulary text and mapped back by its offset
+		token_ids = []
+		encoded = token.encode("utf-8")
+		position = index.find(encoded, vocabulary, vocabulary_end)
+		while position != -1:
+			token_ids.append(bisect.bisect_right(offsets, position - vocabulary) - 1)
+			position = index.find(encoded, index.find(b"\n", position, vocabulary_end) + 1, vocabulary_end)
+
+		## Short tokens sit in most words, their postings would take longer to merge than the books take to scan
+		total = sum(starts[token_id + 1] - starts[token_id] for token_id in token_ids)
+		if total > self._header[4] * 2:
+			positions = None
+		else:
+			postings = self._array(postings_start, self._header[7])
+			positions = set()
+			for token_id in token_ids:
+				positions.update(postings[starts[token_id]:starts[token_id + 1]])
+			postings.release()
+
+		offsets.release()
+		starts.release()
+		return positions
+
+	def find_isbn(self, value: str) -> list:
+		key = canonical_isbn13(value)
+		if not key or not self.is_ready:
+			return []
+		key = int(key)
+
+		index = self._index
+		_, _, isbn_table, _, _, _ = self._sections()
+		record_size = self.ISBN_RECORD.size
+
+		low, high = 0, self._header[8]
+		while low < high:
+			middle = (low + high) // 2
+			if self.ISBN_RECORD.unpack_from(index, isbn_table + middle * record_size)[0] < key:
+				low = middle + 1
+			else:
+				high = middle
+
+		positions = []
+		while low < self._header[8]:
+			found_key, position = self.ISBN_RECORD.unpack_from(index, isbn_table + low * record_size)
+			if found_key != key:
+				break
+			positions.append(position)
+			low += 1
+		return positions
+
+	def search(self, search_text: str, version: tuple) -> list | None:
+		## None when neither the snapshot nor its patch describe the collection as it is now, the caller scans instead
+		if not self.can_answer(version):
+			return None
+		patch = self._patch if tuple(version) != self.version else None
+
+		search_text = search_text.lower()
+		tokens = TOKEN_PATTERN.findall(search_text)
+		if not tokens:
+			return None
+		isbn = isbn_forms(search_text)
+
+		with metrics.span("search_index.lookup"):
+			## Every word of the text lies inside one word of a matching book, the candidates are checked for the whole text
+			candidates = None
+			for token in sorted(set(tokens), key=len, reverse=True):
+				positions = self._positions(token)
+				if positions is None:
+					continue
+				candidates = positions if candidates is None else candidates & positions
+				if not candidates:
+					break
+
+			## A single word is inside a word of every candidate, only longer texts need checking against the books
+			if candidates is None:
+				found = {position for position in range(len(self.documents)) if matches(self.documents[position], search_text)}
+			elif TOKEN_PATTERN.fullmatch(search_text):
+				found = candidates
+			else:
+				found = {position for position in candidates if matches(self.documents[position], search_text)}
+
+			if isbn:
+				found.update(self.find_isbn(isbn[0]))
+
+			if patch is None:
+				return [self.documents[position] for position in sorted(found)]
+
+			## Changed books are checked as they are now and take their old place, new ones come last like in the file
+			_, replaced, removed, added = patch
+			hits = {position: self.documents[position] for position in found if position not in removed and position not in replaced}
+			for position, doc in replaced.items():
+				if matches(doc, search_text, isbn):
+					hits[position] = doc
+
+		return [hits[position] for position in sorted(hits)] + [doc for doc in added if matches(doc, search_text, isbn)]